@@ -0,0 +1,378 @@
+#!/usr/bin/env python
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+
+BASE_PATH = Path(__file__).parent.resolve()
+BENCHDIR = BASE_PATH / 'benchmarks'
+
+# registered benchmarks; each is a function receiving the shared context and returning the callable to be measured
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    def decorator(func: Callable):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+# data shared by benchmarks, each part loaded on first use
+class Context:
+    def __init__(self):
+        self._cache = {}
+
+    def _get(self, key: str, func: Callable):
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+    # inputs after loading data and POSTED tables (but before adding other assumptions)
+    @property
+    def loaded(self) -> dict:
+        def load():
+            from src.load import load_data, load_posted
+
+            inputs = {}
+            load_data(inputs)
+            load_posted(inputs)
+            return inputs
+        return self._get('loaded', load)
+
+    # default inputs and outputs of the started webapp, which also creates the plot instances
+    @property
+    def inputs(self) -> dict:
+        def start():
+            from webapp import start
+            from src.pipeline import default_inputs
+
+            start()
+            return default_inputs()
+        return self._get('inputs', start)
+
+    @property
+    def outputs(self) -> dict:
+        def proc():
+            from src.pipeline import default_outputs
+
+            _ = self.inputs
+            return default_outputs()
+        return self._get('outputs', proc)
+
+    def plot(self, plot_cls: type):
+        from src.plots.BasePlot import BasePlot
+
+        _ = self.inputs
+        return BasePlot.instance(plot_cls, 'webapp')
+
+
+@benchmark('load_data')
+def bench_load_data(ctx: Context):
+    from src.load import load_data
+
+    return lambda: load_data({})
+
+
+@benchmark('load_posted')
+def bench_load_posted(ctx: Context):
+    from src.load import load_data, load_posted
+
+    inputs = {}
+    load_data(inputs)
+    return lambda: load_posted(dict(inputs))
+
+
+@benchmark('load_other')
+def bench_load_other(ctx: Context):
+    from src.load import load_other
+
+    return lambda: load_other(ctx.loaded | {'vc_tables': dict(ctx.loaded['vc_tables'])})
+
+
+# update with table payloads as sent by the webapp, with all values changed from their defaults
+@benchmark('update_inputs')
+def bench_update_inputs(ctx: Context):
+    from src.shared import overlay
+    from src.update import update_inputs
+
+    inputs = ctx.inputs
+    args = [
+        1,
+        inputs['epdcases']
+            .pint.dequantify().droplevel('unit', axis=1)
+            .assign(**{'RE-rich': lambda df: df['RE-rich'] * 0.9})
+            .assign(epdcaseDisplay=lambda df: df['epdcase'].str.capitalize(), processDisplay=lambda df: df['process'])
+            .to_dict('records'),
+        inputs['transp_cost']
+            .assign(assump=lambda df: df['assump'] * 1.1, tradedDisplay=lambda df: df['traded'])
+            .to_dict('records'),
+        (inputs['scenarios'] * 100).reset_index().to_dict('records'),
+        (inputs['volumes'] * 1.1).to_frame('volume').reset_index().to_dict('records'),
+    ]
+    return lambda: update_inputs(overlay(inputs), 'simple-update', args)
+
+
+@benchmark('process_inputs')
+def bench_process_inputs(ctx: Context):
+    from src.proc import process_inputs
+
+    return lambda: process_inputs(ctx.inputs, {})
+
+
+@benchmark('prepare.TotalCostPlot')
+def bench_prepare_total_cost(ctx: Context):
+    from src.plots.TotalCostPlot import TotalCostPlot
+
+    plot, outputs = ctx.plot(TotalCostPlot), ctx.outputs
+    return lambda: [plot._prepare_data(outputs, comm) for comm in ctx.inputs['value_chains']]
+
+
+@benchmark('prepare.LevelisedPlot')
+def bench_prepare_levelised(ctx: Context):
+    from src.plots.LevelisedPlot import LevelisedPlot
+
+    plot, outputs = ctx.plot(LevelisedPlot), ctx.outputs
+    return lambda: [plot._prepare(outputs, comm) for comm in ctx.inputs['value_chains']]
+
+
+@benchmark('prepare.SensitivityPlot')
+def bench_prepare_sensitivity(ctx: Context):
+    from src.plots.SensitivityPlot import SensitivityPlot
+
+    plot, inputs, outputs = ctx.plot(SensitivityPlot), ctx.inputs, ctx.outputs
+    return lambda: [plot._prepare_data(inputs, outputs, comm) for comm in inputs['value_chains']]
+
+
+@benchmark('prepare.ScenarioPlot')
+def bench_prepare_scenario(ctx: Context):
+    from src.plots.ScenarioPlot import ScenarioPlot
+
+    plot, inputs, outputs = ctx.plot(ScenarioPlot), ctx.inputs, ctx.outputs
+    return lambda: plot._prepare(inputs, outputs)
+
+
+# construction of the decorated figures of every plot class, including data preparation
+def _bench_figures(plot_name: str):
+    @benchmark(f"figures.{plot_name}")
+    def bench(ctx: Context):
+        from webapp import plots
+        from src.pipeline import produce
+
+        plot_cls = next(p for p in plots if p.__name__ == plot_name)
+        inputs, outputs = ctx.inputs, ctx.outputs
+        return lambda: produce(plot_cls, inputs, outputs)
+
+
+for _plot_name in ('TotalCostPlot', 'LevelisedPlot', 'SensitivityPlot', 'ScenarioPlot'):
+    _bench_figures(_plot_name)
+
+
+# construction of the figures of all plot classes, one after another or concurrently
+def _bench_plots(executor: str):
+    @benchmark(f"plots.{executor}")
+    def bench(ctx: Context):
+        from webapp import plots
+        from src.pipeline import produce_all
+
+        inputs, outputs = ctx.inputs, ctx.outputs
+        return lambda: produce_all(plots, inputs, outputs, executor=executor)
+
+
+for _executor in ('serial', 'thread', 'process'):
+    _bench_plots(_executor)
+
+
+# time a callable over several runs after a warm-up run, then record its peak allocation in a separate traced run, as
+# tracing distorts timings
+def measure(func: Callable, repeat: int) -> dict:
+    func()
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    if not tracing:
+        tracemalloc.stop()
+
+    return {
+        'time_median': statistics.median(times),
+        'time_min': min(times),
+        'peak_alloc_bytes': peak,
+    }
+
+
+# time full runs of export.py in fresh processes (writing to a temporary directory) and record their peak RSS
+def measure_export(repeat: int, jobs: int) -> dict:
+    times, rss = [], []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = os.environ | {'GVC_OUTPUT_DIR': tmp}
+            start = time.perf_counter()
+            proc = subprocess.Popen([sys.executable, str(BASE_PATH / 'export.py'), '--force', '--jobs', str(jobs)],
+                                    cwd=BASE_PATH, env=env, stdout=subprocess.DEVNULL)
+            sampler = TreeRSS(proc.pid)
+            _, status, rusage = os.wait4(proc.pid, 0)
+            times.append(time.perf_counter() - start)
+            if os.waitstatus_to_exitcode(status):
+                raise RuntimeError('Running export.py failed.')
+
+            # render workers are reaped by export.py and hence count towards the children of this process once it has
+            # been waited for; their summed RSS is only known from sampling
+            children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            rss.append(max(sampler.stop(), max(rusage.ru_maxrss, children.ru_maxrss) * RSS_UNIT))
+
+    return {
+        'time_median': statistics.median(times),
+        'time_min': min(times),
+        'peak_rss_bytes': max(rss),
+    }
+
+
+# unit of ru_maxrss in bytes
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+# peak RSS of a process and all its descendants together, sampled from /proc while it runs (Linux only, otherwise 0)
+class TreeRSS:
+    def __init__(self, pid: int, interval: float = 0.02):
+        self._pid = pid
+        self._interval = interval
+        self._peak = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def _sample(self):
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        while not self._stopped.wait(self._interval):
+            total, pids = 0, [self._pid]
+            while pids:
+                pid = pids.pop()
+                try:
+                    with open(f"/proc/{pid}/statm") as f:
+                        total += int(f.read().split()[1]) * page_size
+                    for task in os.listdir(f"/proc/{pid}/task"):
+                        with open(f"/proc/{pid}/task/{task}/children") as f:
+                            pids.extend(int(c) for c in f.read().split())
+                except (OSError, ValueError):
+                    continue
+            self._peak = max(self._peak, total)
+
+    def stop(self) -> int:
+        self._stopped.set()
+        self._thread.join()
+        return self._peak
+
+
+# compare results against baseline; returns list of regressions beyond the given tolerance
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    print(f"{'benchmark':32s} {'time (ms)':>10s} {'baseline':>10s} {'change':>8s} {'peak (MiB)':>11s} {'baseline':>10s}")
+    for name, r in results.items():
+        b = baseline.get(name, {})
+        peak_key = 'peak_rss_bytes' if 'peak_rss_bytes' in r else 'peak_alloc_bytes'
+
+        def fmt(value, scale):
+            return '-' if value is None else f"{value * scale:.1f}"
+
+        change = f"{r['time_median'] / b['time_median'] - 1.0:+.0%}" if b.get('time_median') else '-'
+        print(f"{name:32s} {fmt(r['time_median'], 1e3):>10s} {fmt(b.get('time_median'), 1e3):>10s} {change:>8s} "
+              f"{fmt(r[peak_key], 2**-20):>11s} {fmt(b.get(peak_key), 2**-20):>10s}")
+
+        for key in ('time_median', peak_key):
+            if b.get(key) and r[key] > b[key] * (1.0 + tolerance):
+                regressions.append(f"{name}: {key} increased by {r[key] / b[key] - 1.0:.0%}")
+
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BASE_PATH, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# run selected benchmarks, store results as JSON, and compare them against the results of a previous run if given
+def main():
+    parser = argparse.ArgumentParser(description='Run benchmarks of the full pipeline and compare against a baseline.')
+    parser.add_argument('names', nargs='*',
+                        help='benchmarks (or prefixes such as `prepare`) to run (default: all)')
+    parser.add_argument('--repeat', '-r', type=int, default=5, help='number of timed runs per benchmark')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='number of render processes for the export run')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative increase counted as regression')
+    parser.add_argument('--baseline', type=Path,
+                        help='results of a previous run on the same machine to compare against')
+    parser.add_argument('--output', '-o', type=Path, help='file to write results to (default: in benchmarks/)')
+    parser.add_argument('--list', action='store_true', help='list available benchmarks')
+    args = parser.parse_args()
+
+    names = list(BENCHMARKS) + ['export']
+    if args.list:
+        print('\n'.join(names))
+        return
+    if args.names:
+        names = [n for n in names if any(n == s or n.startswith(f"{s}.") for s in args.names)]
+        if not names:
+            parser.error('No benchmarks match the given names.')
+
+    ctx = Context()
+    results = {}
+    for name in names:
+        print(f"Running {name}...", end='\r', file=sys.stderr)
+        if name == 'export':
+            results[name] = measure_export(args.repeat, args.jobs)
+        else:
+            results[name] = measure(BENCHMARKS[name](ctx), args.repeat)
+
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    output = args.output or BENCHDIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    baseline = json.loads(args.baseline.read_text())['results'] if args.baseline is not None else {}
+    regressions = compare(results, baseline, args.tolerance)
+    print(f"Results written to {output}.")
+
+    if regressions:
+        sys.exit('Regressions:\n' + '\n'.join(regressions))
+
+
+# call main function when running as script
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import yaml
+
+
+BASE_PATH = Path(__file__).parent.resolve()
+BUDGET_PATH = BASE_PATH / 'config' / 'importtime_budget.yml'
+
+
+# import an entry point in a fresh interpreter with `-X importtime`; returns the cumulative import time of the entry
+# point (ms), which excludes modules imported by the interpreter on start-up, and the cumulative time per imported module
+def measure_import(module: str) -> tuple[float, dict]:
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=BASE_PATH, capture_output=True, text=True,
+    )
+    if proc.returncode:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        m = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', line)
+        if m is None:
+            continue
+        cumulative = int(m.group(2)) / 1000.0
+        modules[m.group(4)] = cumulative
+
+    return modules[module], modules
+
+
+# median cumulative import time (ms) of an entry point over several measurements, the times per imported module, and
+# the violations of its budget and forbidden packages
+def check_entry_point(entry_point: str, spec: dict, tolerance: float, repeat: int = 5) -> tuple[float, dict, list]:
+    runs = [measure_import(entry_point) for _ in range(repeat)]
+    total = statistics.median(r[0] for r in runs)
+    modules = runs[-1][1]
+
+    problems = [
+        f"imports {name}"
+        for name in spec.get('forbidden') or []
+        if name in modules
+    ]
+    budget = spec.get('budget')
+    if budget is not None and total > budget * (1.0 + tolerance):
+        problems.append(f"exceeds budget of {budget:.0f} ms")
+
+    return total, modules, problems
+
+
+# check import times of entry points against their budgets, or update the budgets from the measured times
+def check_imports():
+    parser = argparse.ArgumentParser(description='Check import times of entry points against their budgets.')
+    parser.add_argument('entry_points', nargs='*', help='entry points to check (default: all)')
+    parser.add_argument('--repeat', '-r', type=int, default=5, help='number of measurements per entry point')
+    parser.add_argument('--update', action='store_true', help='record measured times as new budgets')
+    parser.add_argument('--top', type=int, default=10, help='number of slowest imports listed on failure')
+    args = parser.parse_args()
+
+    config = yaml.safe_load(BUDGET_PATH.read_text())
+    entry_points = args.entry_points or list(config['entry_points'])
+
+    failed = []
+    for entry_point in entry_points:
+        spec = config['entry_points'][entry_point]
+        total, modules, problems = check_entry_point(entry_point, spec, config['tolerance'], args.repeat)
+        budget = spec.get('budget')
+        if args.update:
+            problems = [p for p in problems if not p.startswith('exceeds')]
+
+        print(f"{entry_point}: {total:.0f} ms (budget: {'-' if budget is None else f'{budget:.0f} ms'})"
+              f"{''.join(f'; {p}' for p in problems)}")
+        if problems:
+            failed.append(entry_point)
+            for name, t in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+                print(f"    {t:8.1f} ms  {name}")
+
+        if args.update:
+            spec['budget'] = round(total)
+
+    if args.update:
+        text = BUDGET_PATH.read_text()
+        for entry_point in entry_points:
+            text = re.sub(
+                rf"(\n  {entry_point}:\n    budget:)[^\n]*",
+                rf"\g<1> {config['entry_points'][entry_point]['budget']}",
+                text,
+            )
+        BUDGET_PATH.write_text(text)
+
+    if failed:
+        sys.exit(f"Import-time check failed for: {', '.join(failed)}")
+
+
+# call check function when running as script
+if __name__ == '__main__':
+    check_imports()
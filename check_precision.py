@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+import argparse
+import sys
+
+
+# assumption sets compared between precisions: the defaults and variations of WACC and OCF
+SETS = [
+    {},
+    {'wacc': {'RE-rich': 5.0}},
+    {'wacc': {'RE-rich': 20.0}},
+    {'ocf': {'default': 0.7, 'ELH2': 0.3}},
+]
+
+
+# production cost relative to the Base Case (in %) by set, commodity, and case
+def relative_cost(result):
+    keys = ['set', 'commodity', 'epdcase']
+    base = result \
+        .query("impcase=='Base Case'") \
+        .set_index(keys)['value']
+
+    return result \
+        .query("impcase!='Base Case'") \
+        .assign(value=lambda df: 100.0 * df['value'].values / base.loc[list(zip(*(df[k] for k in keys)))].values) \
+        .set_index(keys + ['impcase', 'impsubcase'])['value']
+
+
+# compare memory of the tables and levelised production cost between float64 and float32 storage of the tables, and
+# fail if the deviation of relative production cost exceeds the given bound
+def check_precision():
+    parser = argparse.ArgumentParser(description='Report memory savings and deviations of float32 storage.')
+    parser.add_argument('--max-deviation', type=float, default=0.01,
+                        help='largest acceptable deviation of relative production cost in percentage points '
+                             '(default: 0.01)')
+    args = parser.parse_args()
+
+    from src.lcox import evaluate
+    from src.load import load_data, load_other, load_posted
+    from src.precision import PRECISION, compact_tables, tables_nbytes
+    from src.proc import process_inputs
+
+    if PRECISION != 'float64':
+        parser.error('Unset GVC_PRECISION, so that tables are loaded in float64 for reference.')
+
+    # reference in float64
+    inputs = {}
+    load_data(inputs)
+    load_posted(inputs)
+    load_other(inputs)
+    outputs = {}
+    process_inputs(inputs, outputs)
+    exact = evaluate(inputs, outputs, SETS)
+
+    # same tables stored in float32
+    inputs32 = inputs | {
+        'proc_tables': compact_tables(inputs['proc_tables']),
+        'vc_tables': compact_tables(inputs['vc_tables']),
+    }
+    outputs32 = {}
+    process_inputs(inputs32, outputs32)
+    outputs32['base_tables'] = compact_tables(outputs32['base_tables'])
+    outputs32['tables'] = compact_tables(outputs32['tables'])
+    approx = evaluate(inputs32, outputs32, SETS) \
+        .astype({'value': 'float32'})
+
+    print(f"{'tables':16s} {'float64 (MiB)':>14s} {'float32 (MiB)':>14s} {'saved':>8s}")
+    for name, tables64, tables32 in (('proc_tables', inputs['proc_tables'], inputs32['proc_tables']),
+                                     ('vc_tables', inputs['vc_tables'], inputs32['vc_tables']),
+                                     ('outputs.tables', outputs['tables'], outputs32['tables'])):
+        n64, n32 = tables_nbytes(tables64), tables_nbytes(tables32)
+        print(f"{name:16s} {n64 / 2**20:14.2f} {n32 / 2**20:14.2f} {1.0 - n32 / n64:8.0%}")
+
+    # deviations by commodity: relative production cost in percentage points and absolute production cost in percent
+    deviation_rel = (relative_cost(approx) - relative_cost(exact)).abs()
+    deviation_abs = (approx['value'] / exact['value'] - 1.0).abs() * 100.0
+    print(f"\n{'commodity':16s} {'rel. cost (pp)':>14s} {'cost (%)':>14s}")
+    for comm in exact['commodity'].unique():
+        print(f"{comm:16s} {deviation_rel.xs(comm, level='commodity').max():14.2e} "
+              f"{deviation_abs[exact['commodity'] == comm].max():14.2e}")
+
+    if deviation_rel.max() > args.max_deviation:
+        sys.exit(f"Deviation of relative production cost of {deviation_rel.max():.2e} percentage points exceeds "
+                 f"{args.max_deviation:.2e}.")
+
+
+# call check_precision function when running as script
+if __name__ == '__main__':
+    check_precision()
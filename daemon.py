@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+import argparse
+import base64
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+from pathlib import Path
+
+
+SOCKET_PATH = Path(os.environ.get('GVC_SOCKET', Path(__file__).parent / '.gvc.sock'))
+
+
+# handle newline-delimited JSON requests of a client connection
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                ret = {'ok': True, 'result': self.server.dispatch(json.loads(line))}
+            except Exception as ex:
+                ret = {'ok': False, 'error': repr(ex)}
+            self.wfile.write(json.dumps(ret).encode() + b'\n')
+            self.wfile.flush()
+
+
+class Daemon(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: Path):
+        # refuse to replace the socket of a running daemon or a file that is not a socket; a stale socket left behind by
+        # a daemon that was killed is removed
+        if path.exists() or path.is_symlink():
+            if not stat.S_ISSOCK(path.lstat().st_mode):
+                raise RuntimeError(f"{path} exists and is not a socket.")
+            try:
+                with Client(path) as client:
+                    client.request('ping')
+            except OSError:
+                path.unlink()
+            else:
+                raise RuntimeError(f"A daemon is already listening on {path}.")
+
+        # load inputs and process default outputs once, keeping them resident for all requests
+        from webapp import plots, start
+        from src.pipeline import default_outputs
+
+        start()
+        default_outputs()
+        self._plots = plots
+
+        # only the user running the daemon may connect to it
+        umask = os.umask(0o177)
+        try:
+            super(Daemon, self).__init__(str(path), Handler)
+        finally:
+            os.umask(umask)
+
+    def dispatch(self, req: dict):
+        from src.lcox import evaluate
+        from src.pipeline import default_inputs, default_outputs, generate
+
+        cmd = req.get('cmd')
+        if cmd == 'ping':
+            return 'pong'
+        elif cmd == 'lcox':
+            result = evaluate(default_inputs(), default_outputs(), req['sets'], detailed=req.get('detailed', False))
+            return json.loads(result.to_json(orient='split', index=False))
+        elif cmd == 'figures':
+            import plotly.io as pio
+
+            # only produce the plot classes of the requested figures
+            names = req.get('names')
+            plots = [p for p in self._plots if names is None or any(fig_name in names for fig_name in p.figs)]
+            args = [None] + [req.get(k) for k in ('elec_prices', 'transp_cost', 'scenarios', 'volumes')]
+            figs = generate(plots, args)
+            fmt = req.get('format', 'json')
+            return {
+                fig_name: json.loads(pio.to_json(fig)) if fmt == 'json' else
+                base64.b64encode(pio.to_image(fig, format=fmt)).decode()
+                for fig_name, fig in figs.items()
+                if names is None or fig_name in names
+            }
+        elif cmd == 'export':
+            # skips figures unchanged since their last export, like export.py
+            from export import export_figures
+
+            rebuild, skipped = export_figures(req.get('names'), req.get('formats'), force=req.get('force', False))
+            return {'rebuilt': rebuild, 'skipped': skipped}
+        elif cmd == 'shutdown':
+            threading.Thread(target=self.shutdown).start()
+            return None
+        else:
+            raise ValueError(f"Unknown command: {cmd}")
+
+
+# thin client for submitting requests to a running daemon
+class Client:
+    def __init__(self, path: Path = SOCKET_PATH):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(str(path))
+        self._file = self._sock.makefile('rwb')
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def request(self, cmd: str, **kwargs):
+        self._file.write(json.dumps({'cmd': cmd, **kwargs}).encode() + b'\n')
+        self._file.flush()
+        ret = json.loads(self._file.readline())
+        if not ret['ok']:
+            raise RuntimeError(ret['error'])
+        return ret['result']
+
+    # levelised cost of production for a batch of assumption sets (see src.lcox.evaluate)
+    def lcox(self, sets: list, detailed: bool = False):
+        import pandas as pd
+
+        result = self.request('lcox', sets=sets, detailed=detailed)
+        return pd.DataFrame(result['data'], columns=result['columns'])
+
+    # figures for given webapp table records (omitted tables keep default values), as plotly JSON or encoded images
+    def figures(self, names: list = None, fmt: str = 'json', **tables) -> dict:
+        figs = self.request('figures', names=names, format=fmt, **tables)
+        return figs if fmt == 'json' else {n: base64.b64decode(data) for n, data in figs.items()}
+
+    # export figures to files, skipping those unchanged since their last export unless forced; returns names of rebuilt
+    # and skipped figures
+    def export(self, names: list = None, formats: list = None, force: bool = False) -> dict:
+        return self.request('export', names=names, formats=formats or ['png', 'svg'], force=force)
+
+
+# run daemon in the foreground or stop a running daemon
+def main():
+    parser = argparse.ArgumentParser(description='Evaluation daemon keeping inputs and outputs resident.')
+    parser.add_argument('cmd', choices=['serve', 'stop', 'ping'])
+    parser.add_argument('--socket', type=Path, default=SOCKET_PATH)
+    args = parser.parse_args()
+
+    if args.cmd == 'serve':
+        # the daemon serves no web requests, so plots can run on forked worker processes
+        os.environ.setdefault('GVC_PLOT_EXECUTOR', 'process')
+        with Daemon(args.socket) as server:
+            print(f"Listening on {args.socket}")
+            try:
+                server.serve_forever()
+            finally:
+                args.socket.unlink(missing_ok=True)
+    else:
+        with Client(args.socket) as client:
+            print(client.request('shutdown' if args.cmd == 'stop' else 'ping'))
+
+
+# call main function when running as script
+if __name__ == '__main__':
+    main()
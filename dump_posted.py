@@ -1,9 +1,11 @@
 #!/usr/bin/env python
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pandas as pd
 
-from posted.ted.TEDataFile import TEDataFile
 from posted.config.config import techs
 
 from src.load import load_data, load_posted
@@ -12,39 +14,70 @@ from src.load import load_data, load_posted
 DUMPDIR = Path(__file__).parent / 'dump'
 
 
-# load required data and dump into Excel spreadsheet
-def dump():
-    # load POSTED data
+# prepare raw and processed sheets of a technology from the data captured while loading
+def prepare_sheets(inputs: dict, tid: str) -> list:
+    df1 = inputs['raw_tables'][tid] \
+        .drop(columns=['region']) \
+        .rename(columns=lambda s: s.replace('_', ' ')) \
+        .rename(columns=str.capitalize)
+    df1['Type'] = df1['Type'].str.upper()
+    df2 = inputs['proc_tables'][tid].data['value']
+
+    return [
+        (f"{techs[tid]['name']} (raw)", df1, True),
+        (f"{techs[tid]['name']} (processed)", df2, len(df2) > 1),
+    ]
+
+
+# load required data and dump into Excel spreadsheet and/or columnar files
+def dump(formats: list = ('xlsx',), jobs: int = os.cpu_count()):
+    # load POSTED data, keeping the raw data files read while loading
     inputs = {}
     load_data(inputs)
-    load_posted(inputs)
+    load_posted(inputs, keep_raw=True, prune=False)
+
+    # prepare sheets of all TIDs
+    tids = list(dict.fromkeys([
+        k
+        for comm in inputs['value_chains']
+        for k in reversed(inputs['value_chains'][comm]['graph'].keys())])
+    )
+    sheets = [sheet for tid in tids for sheet in prepare_sheets(inputs, tid)]
 
     # set file path for dumping
     DUMPDIR.mkdir(parents=True, exist_ok=True)
-    file_path = Path(__file__).parent / 'dump' / 'Techno-economic_Assumptions_from_POSTED.xlsx'
+    file_stem = 'Techno-economic_Assumptions_from_POSTED'
 
     # create a writer object for an Excel spreadsheet
-    with pd.ExcelWriter(file_path) as writer:
-        # loop over TIDs
-        tids = list(dict.fromkeys([
-            k
-            for comm in inputs['value_chains']
-            for k in reversed(inputs['value_chains'][comm]['graph'].keys())])
-        )
-        for tid in tids:
-            tedf = TEDataFile(tid)
-            tedf.load()
-            df1 = tedf \
-                .data \
-                .drop(columns=['region']) \
-                .rename(columns=lambda s: s.replace('_', ' ')) \
-                .rename(columns=str.capitalize)
-            df1['Type'] = df1['Type'].str.upper()
-            df1.to_excel(writer, sheet_name=f"{techs[tid]['name']} (raw)")
-            df2 = inputs['proc_tables'][tid].data['value']
-            df2.to_excel(writer, sheet_name=f"{techs[tid]['name']} (processed)", index=(len(df2)>1))
+    if 'xlsx' in formats:
+        with pd.ExcelWriter(DUMPDIR / f"{file_stem}.xlsx") as writer:
+            for sheet_name, df, index in sheets:
+                df.to_excel(writer, sheet_name=sheet_name, index=index)
+
+    # write one Parquet file per sheet
+    if 'parquet' in formats:
+        path = DUMPDIR / file_stem
+        path.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(
+                lambda sheet: _to_parquet(sheet[1], path / f"{sheet[0]}.parquet"),
+                sheets,
+            ))
+
+
+# write dataframe to Parquet, flattening column names and converting quantities to strings
+def _to_parquet(df: pd.DataFrame, path: Path):
+    df = df.reset_index(drop=(df.index.nlevels == 1 and df.index.name is None))
+    df.columns = [' '.join(map(str, c)) if isinstance(c, tuple) else str(c) for c in df.columns]
+    df = df.apply(lambda col: col.astype(str) if col.dtype == 'object' or str(col.dtype).startswith('pint') else col)
+    df.to_parquet(path, index=False)
 
 
 # call dump function when running as script
 if __name__ == '__main__':
-    dump()
+    parser = argparse.ArgumentParser(description='Dump techno-economic assumptions from POSTED.')
+    parser.add_argument('--format', '-f', nargs='+', choices=['xlsx', 'parquet'], default=['xlsx'],
+                        help='output formats (default: xlsx)')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(), help='number of threads writing Parquet files')
+    args = parser.parse_args()
+    dump(args.format, args.jobs)
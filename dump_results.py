@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+import argparse
 from pathlib import Path
 
 import pandas as pd
@@ -7,13 +8,26 @@ from posted.calc_routines.LCOX import LCOX
 
 from src.load import load_data, load_posted, load_other
 from src.proc import process_inputs
+from src.store import SUFFIXES, ResultWriter, long_format, render_excel, wide_format
 
 
 DUMPDIR = Path(__file__).parent / 'dump'
+FILE_STEM = 'Results_reported_in_Figs_4-6'
 
 
-# load required data and dump into Excel spreadsheet
-def dump():
+# yield long-format LCOX results one commodity at a time
+def iter_results(inputs: dict, outputs: dict):
+    for comm in inputs['value_chains']:
+        # produce LCOX DataTable by assuming final elec prices and applying calc routine
+        lcox = outputs['tables'][comm] \
+            .assume(outputs['cases'][comm]) \
+            .calc(LCOX)
+
+        yield comm, long_format(comm, lcox.data['LCOX'])
+
+
+# load required data and dump into columnar stores and/or Excel spreadsheet
+def dump(formats: list = ('xlsx',)):
     # load inputs and outputs
     inputs = {}
     outputs = {}
@@ -22,39 +36,35 @@ def dump():
     load_other(inputs)
     process_inputs(inputs, outputs)
 
-    # set file path for dumping
+    # set file paths for dumping
     DUMPDIR.mkdir(parents=True, exist_ok=True)
-    file_path = Path(__file__).parent / 'dump' / 'Results_reported_in_Figs_4-6.xlsx'
-
-    # create a writer object for an Excel spreadsheet
-    with pd.ExcelWriter(file_path) as writer:
-        # loop over commodities
-        commodities = list(inputs['value_chains'].keys())
-        for c, comm in enumerate(commodities):
-            # produce LCOX DataTable by assuming final elec prices and applying calc routine
-            lcox = outputs['tables'][comm] \
-                .assume(outputs['cases'][comm]) \
-                .calc(LCOX)
-
-            # extract dataframe from LCOX DataTable and convert to plottable format
-            comm_data = lcox.data['LCOX'] \
-                .pint.dequantify().droplevel('unit', axis=1) \
-                .stack(['process', 'type']).to_frame('value') \
-                .reset_index() \
-                .drop(columns=['impcase'])
-
-            # set index
-            comm_data = comm_data \
-                .set_index(['epdcase', 'impsubcase', 'type', 'process']) \
-                .unstack(['type', 'process']) \
-                .droplevel(level=0, axis=1) \
-                .sort_index(axis=0) \
-                .sort_index(axis=1)
-
-            # dump to spreadsheet
-            comm_data.to_excel(writer, sheet_name=comm, index=True)
+    store_paths = {fmt: DUMPDIR / f"{FILE_STEM}{SUFFIXES[fmt]}" for fmt in formats if fmt in SUFFIXES}
+
+    # stream results of each commodity into columnar stores
+    if store_paths:
+        writers = [ResultWriter(path, fmt) for fmt, path in store_paths.items()]
+        try:
+            for comm, comm_data in iter_results(inputs, outputs):
+                for writer in writers:
+                    writer.write(comm_data)
+        finally:
+            for writer in writers:
+                writer.close()
+
+    # render Excel spreadsheet from a columnar store if one was written, otherwise directly from the results
+    if 'xlsx' in formats:
+        file_path = DUMPDIR / f"{FILE_STEM}.xlsx"
+        if store_paths:
+            render_excel(next(iter(store_paths.values())), file_path, inputs['value_chains'])
+        else:
+            with pd.ExcelWriter(file_path) as writer:
+                for comm, comm_data in iter_results(inputs, outputs):
+                    wide_format(comm_data).to_excel(writer, sheet_name=comm, index=True)
 
 
 # call dump function when running as script
 if __name__ == '__main__':
-    dump()
+    parser = argparse.ArgumentParser(description='Dump results reported in Figs. 4-6.')
+    parser.add_argument('--format', '-f', nargs='+', choices=['xlsx'] + list(SUFFIXES), default=['xlsx'],
+                        help='output formats (default: xlsx)')
+    dump(parser.parse_args().format)
@@ -1,17 +1,62 @@
 #!/usr/bin/env python
-import sys
+import argparse
+import os
+from pathlib import Path
+from typing import Optional
 
-from webapp import webapp
+from webapp import plots, output_dir
+from src.manifest import Manifest, figure_hashes
 
 
-# get list of figs to plot from command line args and call webapp.export()
+# export figures via webapp.export() (all if no names are given); the figures are computed once, while rendering them
+# via kaleido is dispatched to a pool of worker processes; figures whose input data, config, and code are unchanged
+# since their last export in the given formats are skipped unless forced; returns names of rebuilt and skipped figures
+def export_figures(fig_names: Optional[list] = None, formats: Optional[list] = None, n_jobs: Optional[int] = None,
+                   force: bool = False) -> tuple[list, list]:
+    formats = formats or ['png', 'svg']
+
+    # determine figures that need rebuilding
+    hashes = figure_hashes(plots)
+    manifest = Manifest(output_dir / 'manifest.json')
+    fig_names = fig_names or list(hashes)
+    rebuild = [f for f in fig_names if force or f not in hashes or not manifest.is_current(f, hashes[f], formats)]
+    skipped = [f for f in fig_names if f not in rebuild]
+
+    if rebuild:
+        from webapp import webapp
+        from src.metrics import allocation_report
+        from src.render import deferred_image_writes, render_jobs
+
+        with allocation_report('export'), deferred_image_writes() as jobs:
+            webapp.export(rebuild, export_formats=formats)
+        files = render_jobs(jobs, n_jobs or os.cpu_count())
+
+        # record hashes and exported files of rebuilt figures
+        for fig_name in rebuild:
+            if fig_name not in hashes:
+                continue
+            manifest.update(fig_name, hashes[fig_name], [
+                f for f in files
+                if Path(f).stem == fig_name or Path(f).stem.startswith(f"{fig_name}_")
+            ])
+        manifest.save()
+
+    return rebuild, skipped
+
+
+# get list of figs to plot and number of parallel render jobs from command line args and export them
 def export():
-    if len(sys.argv) > 1:
-        fig_names = sys.argv[1:]
-    else:
-        fig_names = None
+    parser = argparse.ArgumentParser(description='Export figures.')
+    parser.add_argument('fig_names', nargs='*', help='names of figures to export (default: all)')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(),
+                        help='number of parallel render processes (default: number of CPUs)')
+    parser.add_argument('--force', '-f', action='store_true', help='export figures even if unchanged')
+    args = parser.parse_args()
+
+    rebuild, skipped = export_figures(args.fig_names, n_jobs=args.jobs, force=args.force)
 
-    webapp.export(fig_names, export_formats=['png', 'svg'])
+    print(f"Rebuilt: {', '.join(rebuild) or '-'}")
+    print(f"Skipped (unchanged): {', '.join(skipped) or '-'}")
 
 
 # call export function when running as script
@@ -0,0 +1,51 @@
+# gunicorn configuration for serving the webapp with data loaded once in the master process and shared copy-on-write
+# with forked workers; run via: gunicorn -c gunicorn.conf.py
+import gc
+import os
+import tempfile
+
+
+wsgi_app = 'wsgi:application'
+bind = os.environ.get('GVC_BIND', '127.0.0.1:8050')
+workers = int(os.environ.get('GVC_WORKERS', 4))
+threads = int(os.environ.get('GVC_THREADS', 1))
+worker_class = os.environ.get('GVC_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+
+# requests polling a background job may hit any worker, so workers share the state and figures of their jobs via a
+# directory unique to this server
+if workers > 1:
+    os.environ.setdefault('GVC_JOB_DIR', tempfile.mkdtemp(prefix='gvc-jobs-'))
+
+# event streams of jobs hold their worker for the duration of a job, so they are only served by threaded or async workers
+if worker_class == 'sync':
+    os.environ.setdefault('GVC_SSE', '0')
+
+# import wsgi (and hence load all data) in the master process before forking workers
+preload_app = True
+
+
+# avoid garbage collection touching (and thereby copying) pages of the loaded data before forking
+def on_starting(server):
+    gc.disable()
+
+
+# move all objects created while loading into the permanent generation, so that the collector in workers never scans
+# (and hence never dirties) them
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
+
+
+# report memory unique to each worker once it is ready to serve; the savings from sharing show as a small USS compared
+# to the RSS of the worker
+def post_worker_init(worker):
+    from src.metrics import memory_usage
+
+    mem = memory_usage()
+    worker.log.info(
+        'Worker %s memory: RSS %.1f MiB, PSS %.1f MiB, USS %.1f MiB',
+        worker.pid, *(mem.get(k, 0) / 1024 ** 2 for k in ('rss', 'pss', 'uss')),
+    )
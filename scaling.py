@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+import argparse
+import json
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from benchmark import BENCHDIR, measure
+from src.synthetic import DEFAULTS, synthetic_inputs
+
+
+# stages measured for every problem size
+def stages(size: dict) -> dict:
+    from src.lcox import evaluate
+    from src.load import load_other, load_vc_tables
+    from src.proc import process_inputs
+
+    inputs = synthetic_inputs(**size)
+    outputs = {}
+    process_inputs(inputs, outputs)
+
+    def load():
+        tmp = dict(inputs)
+        load_vc_tables(tmp)
+        load_other(tmp)
+
+    return {
+        'load_vc_tables': load,
+        'process_inputs': lambda: process_inputs(inputs, {}),
+        'lcox': lambda: evaluate(inputs, outputs, [{}], detailed=True),
+    }
+
+
+# measure run time and peak memory of the load, proc, and LCOX stages on synthetic problems of growing size, and fit
+# the exponent of run time against size on a log-log scale to catch super-linear behaviour
+def scaling():
+    parser = argparse.ArgumentParser(description='Measure scaling of the pipeline with synthetic problem size.')
+    parser.add_argument('param', choices=list(DEFAULTS), help='size parameter to vary')
+    parser.add_argument('sizes', nargs='+', type=int, help='values of the size parameter')
+    for param, default in DEFAULTS.items():
+        parser.add_argument(f"--{param.replace('_', '-')}", type=int, default=default,
+                            help=f"value of fixed size parameter (default: {default})")
+    parser.add_argument('--repeat', '-r', type=int, default=3, help='number of timed runs per stage and size')
+    parser.add_argument('--max-exponent', type=float, default=1.2,
+                        help='largest acceptable scaling exponent of run time (default: 1.2)')
+    args = parser.parse_args()
+
+    results = []
+    for value in args.sizes:
+        size = {param: getattr(args, param) for param in DEFAULTS} | {args.param: value}
+        for name, func in stages(size).items():
+            r = measure(func, args.repeat)
+            results.append({'stage': name, args.param: value} | r)
+            print(f"{args.param}={value:<6d} {name:16s} {r['time_median'] * 1e3:10.1f} ms "
+                  f"{r['peak_alloc_bytes'] / 2**20:10.1f} MiB")
+
+    # fit scaling exponents
+    exponents = {}
+    if len(set(args.sizes)) > 1:
+        for name in dict.fromkeys(r['stage'] for r in results):
+            x = [r[args.param] for r in results if r['stage'] == name]
+            y = [r['time_median'] for r in results if r['stage'] == name]
+            exponents[name] = float(np.polyfit(np.log(x), np.log(y), 1)[0])
+            print(f"{name:16s} run time ~ {args.param}^{exponents[name]:.2f}")
+
+    output = BENCHDIR / f"scaling-{args.param}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({'param': args.param, 'results': results, 'exponents': exponents}, indent=2))
+    print(f"Results written to {output}.")
+
+    superlinear = [name for name, e in exponents.items() if e > args.max_exponent]
+    if superlinear:
+        sys.exit(f"Super-linear scaling in: {', '.join(superlinear)}")
+
+
+# call scaling function when running as script
+if __name__ == '__main__':
+    scaling()
@@ -0,0 +1,158 @@
+import hmac
+import io
+import json
+import os
+import re
+import uuid
+
+import plotly.io as pio
+from flask import Flask, Response, abort, jsonify, request
+
+from src import jobs, metrics, profiling
+from src.jobs import SESSION_COOKIE, JobCancelled, job_queue, session_id
+from src.lcox import evaluate
+from src.pipeline import default_inputs, default_outputs, generate
+
+
+# maximum number of assumption sets per batch request to the LCOX endpoint
+MAX_BATCH_SIZE = int(os.environ.get('GVC_MAX_BATCH_SIZE', 100))
+
+# seconds between keep-alive comments of event streams while waiting for figures
+SSE_KEEPALIVE = 15.0
+
+# serve event streams of jobs; disabled by gunicorn.conf.py under sync workers, where each stream would occupy a whole
+# worker process for the duration of a job
+SSE_ENABLED = os.environ.get('GVC_SSE', '1') not in ('', '0', 'false')
+
+
+# whether the current request may profile generate calls: requires the token set via GVC_PROFILE_TOKEN
+def _profiling_allowed() -> bool:
+    token = profiling.PROFILE_TOKEN
+    return token is not None and hmac.compare_digest(request.headers.get('X-Profile-Token', '').encode(), token.encode())
+
+
+def _profiling_denied():
+    return jsonify({'error': 'Profiling requires the token set via GVC_PROFILE_TOKEN in header X-Profile-Token.'}), 403
+
+
+# register HTTP endpoints of the webapp on its flask app
+def register_api(flask_app: Flask, plots: list):
+    # assign a session cookie, so that superseded generate runs of the same browser session can be cancelled
+    @flask_app.after_request
+    def set_session_cookie(response):
+        if SESSION_COOKIE not in request.cookies:
+            response.set_cookie(SESSION_COOKIE, uuid.uuid4().hex, httponly=True, samesite='Lax')
+        return response
+
+    # stop profiles of GENERATE callbacks and finish their jobs once their request has been handled
+    flask_app.teardown_request(profiling.end_request)
+    flask_app.teardown_request(metrics.end_report)
+    flask_app.teardown_request(jobs.end_request)
+
+    # drop responses of superseded GENERATE callbacks with status 204, as Dash does for PreventUpdate
+    flask_app.register_error_handler(JobCancelled, lambda ex: ('', 204))
+
+    # submit a generate run to the background worker pool; omitted tables keep their default values and query flag
+    # `profile` profiles this run
+    @flask_app.route('/api/generate', methods=['POST'])
+    def api_generate():
+        payload = request.get_json(force=True, silent=True) or {}
+        args = [None] + [payload.get(k) for k in ('elec_prices', 'transp_cost', 'scenarios', 'volumes')]
+        profile = request.args.get('profile', '0') not in ('', '0', 'false')
+        if profile and not _profiling_allowed():
+            return _profiling_denied()
+        job = job_queue.submit(session_id(), generate, plots, args, 'webapp', profile)
+        return jsonify(job.to_dict()), 202
+
+    # profile the next n generate calls of this process (both GENERATE callbacks and API jobs); n counts from the calls
+    # already armed and is a positive integer up to the maximum number of armed calls
+    @flask_app.route('/api/profile', methods=['POST'])
+    def api_profile():
+        if not _profiling_allowed():
+            return _profiling_denied()
+        n = request.args.get('next', '1')
+        if re.fullmatch(r'[0-9]+', n) is None or not 1 <= int(n) <= profiling.MAX_PROFILES:
+            error = f"Query parameter `next` must be an integer from 1 to {profiling.MAX_PROFILES}."
+            return jsonify({'error': error}), 400
+        remaining = profiling.arm(int(n))
+        return jsonify({'remaining': remaining})
+
+    # report progress of a generate run and return its figures, including those of plots already done while it is
+    # still running
+    @flask_app.route('/api/jobs/<job_id>', methods=['GET'])
+    def api_job(job_id: str):
+        job = job_queue.get(job_id)
+        if job is None:
+            abort(404)
+
+        ret = job.to_dict()
+        figs = job.result if job.status == 'done' else dict(job.figures)
+        ret['figures'] = {
+            fig_name: json.loads(pio.to_json(fig))
+            for fig_name, fig in figs.items()
+            if fig is not None
+        }
+
+        return jsonify(ret)
+
+    # stream the figures of a generate run as server-sent events, one `figure` event per figure as soon as its plot is
+    # done, followed by a final `done` event with the status of the job
+    @flask_app.route('/api/jobs/<job_id>/events', methods=['GET'])
+    def api_job_events(job_id: str):
+        if not SSE_ENABLED:
+            return jsonify({'error': 'Event streams are disabled for this server, poll /api/jobs/<job_id> instead.'}), 501
+        job = job_queue.get(job_id)
+        if job is None:
+            abort(404)
+
+        def events():
+            sent = set()
+            while True:
+                finished = job.finished is not None
+                for fig_name, fig in list(job.figures.items()):
+                    if fig_name not in sent:
+                        sent.add(fig_name)
+                        data = f'{{"name": {json.dumps(fig_name)}, "figure": {pio.to_json(fig)}}}'
+                        yield f"event: figure\ndata: {data}\n\n"
+                if finished:
+                    yield f"event: done\ndata: {json.dumps(job.to_dict())}\n\n"
+                    return
+                if not job.wait(len(sent), SSE_KEEPALIVE):
+                    yield ': keep-alive\n\n'
+
+        return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+    # evaluate levelised cost of production for a batch of assumption sets; returns JSON in split orientation or, with
+    # query flag `format=arrow`, an Arrow IPC stream
+    @flask_app.route('/api/lcox', methods=['POST'])
+    def api_lcox():
+        payload = request.get_json(force=True, silent=True)
+        assumption_sets = payload.get('sets') if isinstance(payload, dict) else None
+        if not isinstance(assumption_sets, list) or not assumption_sets:
+            return jsonify({'error': 'Expected a non-empty list of assumption sets in field `sets`.'}), 400
+        if len(assumption_sets) > MAX_BATCH_SIZE:
+            return jsonify({'error': f"Batch size is limited to {MAX_BATCH_SIZE} assumption sets."}), 413
+
+        try:
+            result = evaluate(default_inputs(), default_outputs(), assumption_sets,
+                              detailed=request.args.get('detailed', '0') not in ('', '0', 'false'))
+        except (ValueError, KeyError, TypeError) as ex:
+            return jsonify({'error': str(ex)}), 400
+
+        if request.args.get('format') == 'arrow':
+            try:
+                import pyarrow as pa
+            except ImportError:
+                return jsonify({'error': 'Arrow output requires package pyarrow.'}), 501
+            table = pa.Table.from_pandas(result, preserve_index=False)
+            sink = io.BytesIO()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return Response(sink.getvalue(), mimetype='application/vnd.apache.arrow.stream')
+
+        return Response(result.to_json(orient='split', index=False), mimetype='application/json')
+
+    # expose per-stage timings and allocations of this process for scraping by Prometheus
+    @flask_app.route('/metrics', methods=['GET'])
+    def api_metrics():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -1,11 +1,14 @@
-from dash import html, dash_table
-import dash_bootstrap_components as dbc
-
 from posted.config.config import flowTypes
 
+from src.patch import ERROR_ID, JOB_ID, POLL_ID, POLL_INTERVAL, STATE_ID
+from src.utils import load_yaml_config_file
+
 
 # create main control card
 def main_ctrl(default_inputs: dict):
+    from dash import html, dash_table, dcc
+    import dash_bootstrap_components as dbc
+
     table_data_elec_price = default_inputs['epdcases'] \
         .pint.dequantify() \
         .droplevel(level='unit', axis=1) \
@@ -162,9 +165,114 @@ def main_ctrl(default_inputs: dict):
                 className='card-element',
             ),
             html.Div(
-                children=html.Button(id='simple-update', n_clicks=0, children='GENERATE', className='btn btn-primary'),
+                children=[
+                    html.Button(id='simple-update', n_clicks=0, children='GENERATE', className='btn btn-primary'),
+                    dcc.Store(id=STATE_ID, data={}),
+                    dcc.Store(id=JOB_ID),
+                    dcc.Interval(id=POLL_ID, interval=POLL_INTERVAL, disabled=True),
+                    html.Div(id=ERROR_ID, className='text-danger'),
+                ],
+                className='card-element',
+            ),
+        ],
+        className='side-card elements-card',
+    )]
+
+
+# create control card for exploring relative production cost with sliders
+def explore_ctrl(default_inputs: dict):
+    from dash import html, dcc
+    import dash_bootstrap_components as dbc
+
+    from src.surrogate import AXES
+
+    epd = default_inputs['epdcases'] \
+        .pint.dequantify() \
+        .droplevel(level='unit', axis=1) \
+        .query("epdcase=='medium' & process=='ELH2'") \
+        .pipe(lambda df: float((df['RE-scarce'] - df['RE-rich']).iloc[0]))
+    h2transp = float(default_inputs['transp_cost'].query("traded=='h2'")['assump'].max())
+    wacc = float(default_inputs['other_assump']['irate']['RE-rich'])
+
+    def slider(param: str, label: str, value: float):
+        ax = AXES[param]
+        return html.Div(
+            [
+                dbc.Label(label, html_for=f"explore-{param}"),
+                dcc.Slider(
+                    id=f"explore-{param}",
+                    min=ax[0],
+                    max=ax[-1],
+                    value=value,
+                    marks={float(v): f"{v:g}" for v in ax},
+                    updatemode='drag',
+                ),
+            ],
+            className='card-element',
+        )
+
+    return [html.Div(
+        id='explore-controls-card',
+        children=[
+            html.Div(
+                children='Move the sliders to explore the production cost relative to the Base Case. Results are '
+                         'interpolated from precomputed values, so they update instantly.',
+                className='card-element',
+            ),
+            slider('epd', 'Electricity-price difference (EUR/MWh)', epd),
+            slider('h2transp', 'H2 transport cost, all subcases (EUR/MWh)', h2transp),
+            slider('wacc', 'WACC for RE-rich exporter (%)', wacc),
+            html.Div(
+                dcc.Graph(id='explore-graph', config={'displayModeBar': False}),
                 className='card-element',
             ),
+            html.Div(id='explore-error', className='card-element'),
         ],
         className='side-card elements-card',
     )]
+
+
+# update relative production cost curves from the surrogate lattice without processing inputs
+def update_explore(epd: float, h2transp: float, wacc: float):
+    import plotly.graph_objects as go
+
+    from src.surrogate import N_VALIDATE, default_surrogate
+
+    surrogate = default_surrogate()
+    data = surrogate.query(epd=epd, h2transp=h2transp, wacc=wacc)
+    colours = load_yaml_config_file('global')['commodity_colours']
+
+    fig = go.Figure()
+    for comm, comm_data in data.groupby('commodity', sort=False):
+        comm_data = comm_data.sort_values(by='impsubcase')
+        fig.add_trace(go.Scatter(
+            x=comm_data['impsubcase'],
+            y=comm_data['LCOP_rel'],
+            error_y=dict(type='data', array=comm_data['error'], visible=True),
+            name=comm,
+            mode='markers+lines',
+            line_color=colours.get(comm),
+        ))
+    fig.add_hline(100.0, line_color='black')
+    fig.update_layout(
+        yaxis=dict(title='Production cost relative to Base Case (%)', range=[0.0, 125.0]),
+        margin=dict(l=0, r=0, t=10, b=0),
+        height=350,
+        legend=dict(orientation='h'),
+    )
+
+    return fig, f"Interpolation error estimated from {N_VALIDATE} random points: up to {data['error'].max():.2f} " \
+                f"percentage points compared to exact evaluation."
+
+
+# register callbacks of the control cards
+def register_ctrl_callbacks():
+    from dash import Input, Output, callback
+
+    callback(
+        Output('explore-graph', 'figure'),
+        Output('explore-error', 'children'),
+        Input('explore-epd', 'value'),
+        Input('explore-h2transp', 'value'),
+        Input('explore-wacc', 'value'),
+    )(update_explore)
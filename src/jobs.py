@@ -0,0 +1,378 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from src.stages import _current_job, current_job, stage
+
+
+SESSION_COOKIE = 'gvc_session'
+
+# directory shared by the worker processes of a server (e.g. set by gunicorn.conf.py), holding the state and figures of
+# their jobs, so that requests polling a job or streaming its figures can be served by any worker; jobs are only kept in
+# memory of the process running them if unset
+JOB_DIR = os.environ.get('GVC_JOB_DIR')
+
+# seconds between reads of the state of a job run by another worker process while waiting for it
+STORE_POLL = 0.25
+
+
+# raised at stage boundaries when a job was superseded; the webapp answers GENERATE callbacks raising it like Dash
+# answers PreventUpdate (see src.api), so that the response of a superseded callback is silently dropped
+class JobCancelled(Exception):
+    pass
+
+
+# write a file atomically, so that other processes never read it partially written
+def _write(path: Path, data: str):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# state and figures of jobs, and the latest job of each session, in a directory shared by the worker processes of a
+# server; each job is only ever written by the process running it
+class JobStore:
+    def __init__(self, path):
+        self._path = Path(path)
+        (self._path / 'sessions').mkdir(parents=True, exist_ok=True)
+
+    def _session_path(self, session: str) -> Path:
+        return self._path / 'sessions' / hashlib.sha256(session.encode()).hexdigest()[:32]
+
+    def set_latest(self, session: str, job_id: str):
+        _write(self._session_path(session), job_id)
+
+    def latest(self, session: str) -> Optional[str]:
+        try:
+            return self._session_path(session).read_text()
+        except FileNotFoundError:
+            return None
+
+    def save(self, job: 'Job'):
+        path = self._path / job.id
+        path.mkdir(exist_ok=True)
+        _write(path / 'job.json', json.dumps(job.to_dict() | {
+            'session': job.session,
+            'created': job.created,
+            'finished': job.finished,
+        }))
+
+    # figures are written before the state of the job, so that readers seeing it finished find all its figures
+    def save_figures(self, job: 'Job', figs: dict):
+        import plotly.io as pio
+
+        path = self._path / job.id / 'figures'
+        path.mkdir(parents=True, exist_ok=True)
+        for fig_name, fig in figs.items():
+            _write(path / f"{fig_name}.json", pio.to_json(fig))
+
+    def load(self, job_id: str) -> Optional['StoredJob']:
+        # job IDs are hex digests, anything else must not be resolved as a path
+        if not job_id.isalnum():
+            return None
+        state = self._read(job_id)
+        return StoredJob(self, state) if state is not None else None
+
+    def _read(self, job_id: str) -> Optional[dict]:
+        try:
+            return json.loads((self._path / job_id / 'job.json').read_text())
+        except FileNotFoundError:
+            return None
+
+    def figures(self, job_id: str) -> dict:
+        ret = {}
+        for path in sorted((self._path / job_id / 'figures').glob('*.json')):
+            ret[path.stem] = json.loads(path.read_text())
+        return ret
+
+    # remove jobs finished longer ago than the given number of seconds, and sessions not active since then
+    def prune(self, keep: float):
+        now = time.time()
+        for path in self._path.iterdir():
+            if path.name == 'sessions' or not path.is_dir():
+                continue
+            state = self._read(path.name)
+            if state is not None and state['finished'] is not None and now - state['finished'] > keep:
+                shutil.rmtree(path, ignore_errors=True)
+        for path in (self._path / 'sessions').iterdir():
+            if now - path.stat().st_mtime > keep:
+                path.unlink(missing_ok=True)
+
+
+# read-only view of a job run by another worker process, as last saved to the job store
+class StoredJob:
+    def __init__(self, store: JobStore, state: dict):
+        self._store = store
+        self._update(state)
+
+    def _update(self, state: dict):
+        self.id = state['id']
+        self.session = state['session']
+        self.status = state['status']
+        self.stages = state['stages']
+        self.error = state['error']
+        self.created = state['created']
+        self.finished = state['finished']
+
+    @property
+    def figures(self) -> dict:
+        return self._store.figures(self.id)
+
+    @property
+    def result(self) -> Optional[dict]:
+        return self.figures if self.status == 'done' else None
+
+    # wait until more than the given number of figures is available or the job has finished; returns False on timeout
+    def wait(self, n_figures: int, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            state = self._store._read(self.id)
+            if state is not None:
+                self._update(state)
+            if self.finished is not None or len(self.figures) > n_figures:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(min(STORE_POLL, max(deadline - time.monotonic(), 0)))
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'stages': self.stages,
+            'error': self.error,
+        }
+
+
+# statuses of jobs that have ended
+FINAL_STATUSES = ('cancelled', 'done', 'failed')
+
+
+# a job run by this process; with a job store, its state and figures are saved there for other worker processes, and
+# it counts as cancelled once another job of its session was tracked by any of them (jobs without a session are never
+# superseded)
+class Job:
+    def __init__(self, session: Optional[str], store: Optional[JobStore] = None):
+        self.id = uuid.uuid4().hex
+        self.session = session
+        self.status = 'queued'
+        self.stages = []
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.figures = {}
+        self._store = store
+        self._pid = os.getpid()
+        self._save_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._updated = threading.Condition()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._cancelled.is_set() and self._store is not None and self.session is not None \
+                and self._store.latest(self.session) not in (None, self.id):
+            self._cancelled.set()
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self.set_status('cancelled')
+
+    # the only way to change the status of a job; the final status of a job (cancelled, done, or failed) never changes,
+    # so a job cancelled while finishing stays cancelled; returns whether the status was changed
+    def set_status(self, status: str, error: Optional[str] = None) -> bool:
+        with self._updated:
+            if self.status in FINAL_STATUSES or self.status == status:
+                return False
+            self.status = status
+            if error is not None:
+                self.error = error
+            self._save()
+        return True
+
+    def enter_stage(self, name: str):
+        if self.cancelled:
+            raise JobCancelled()
+        self.set_status('running')
+        self.stages.append({'stage': name, 'started': time.time(), 'finished': None})
+        self._save()
+
+    # add a stage run by another process (e.g. a forked plot worker) once it is done; aborts like enter_stage() if the
+    # job was superseded
+    def add_stage(self, name: str, started: float, finished: Optional[float]):
+        if self.cancelled:
+            raise JobCancelled()
+        self.set_status('running')
+        self.stages.append({'stage': name, 'started': started, 'finished': finished})
+        self._save()
+
+    def leave_stage(self, name: str):
+        for s in reversed(self.stages):
+            if s['stage'] == name and s['finished'] is None:
+                s['finished'] = time.time()
+                break
+        self._save()
+
+    # make figures available before the job has finished
+    def publish(self, figs: dict):
+        figs = {fig_name: fig for fig_name, fig in figs.items() if fig is not None and fig_name not in self.figures}
+        if self._store is not None:
+            self._store.save_figures(self, figs)
+        with self._updated:
+            # replaced rather than updated, so that readers in other threads can iterate without holding the lock
+            self.figures = self.figures | figs
+            self._updated.notify_all()
+
+    # saved before waking waiters, so that other worker processes never see a finished job still running
+    def finish(self):
+        with self._updated:
+            self.finished = time.time()
+            self._save()
+            self._updated.notify_all()
+
+    # save the state of the job to the job store; copies of the job in forked plot workers never do, as their stages would
+    # overwrite those of the job itself; saves are serialised, so that the last save holds the latest state
+    def _save(self):
+        if self._store is not None and os.getpid() == self._pid:
+            with self._save_lock:
+                self._store.save(self)
+
+    # wait until more than the given number of figures is available or the job has finished; returns False on timeout
+    def wait(self, n_figures: int, timeout: float) -> bool:
+        with self._updated:
+            return self._updated.wait_for(lambda: len(self.figures) > n_figures or self.finished is not None, timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'stages': self.stages,
+            'error': self.error,
+        }
+
+
+class JobQueue:
+    def __init__(self, max_workers: int = 2, keep: float = 600.0, store: Optional[JobStore] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gvc-job')
+        self._keep = keep
+        self._store = store
+        self._jobs = {}
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    # create a new job for a session and cancel the one it supersedes; without a session, no job is cancelled
+    def track(self, session: Optional[str], listed: bool = True) -> Job:
+        job = Job(session, self._store if listed else None)
+        if self._store is not None and session is not None:
+            self._store.set_latest(session, job.id)
+        with self._lock:
+            previous = self._latest.get(session) if session is not None else None
+            if previous is not None:
+                previous.cancel()
+            self._prune()
+            if session is not None:
+                self._latest[session] = job
+            if listed:
+                self._jobs[job.id] = job
+        job._save()
+        return job
+
+    def submit(self, session: Optional[str], func: Callable, *args) -> Job:
+        job = self.track(session)
+        self._executor.submit(self._run, job, func, *args)
+        return job
+
+    # a job of this process, or else one of another worker process found in the job store
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self._store is not None:
+            return self._store.load(job_id)
+        return job
+
+    def _run(self, job: Job, func: Callable, *args):
+        if job.cancelled:
+            job.set_status('cancelled')
+            job.finish()
+            return
+        token = _current_job.set(job)
+        try:
+            job.result = func(*args)
+            if self._store is not None and isinstance(job.result, dict):
+                job.publish(job.result)
+            job.set_status('done')
+        except JobCancelled:
+            job.set_status('cancelled')
+        except Exception as ex:
+            job.set_status('failed', repr(ex))
+        finally:
+            job.finish()
+            _current_job.reset(token)
+
+    # forget jobs and latest jobs of sessions that finished longer ago than the time jobs are kept
+    def _prune(self):
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and now - job.finished > self._keep]:
+            del self._jobs[job_id]
+        for session in [session for session, job in self._latest.items()
+                        if job.finished is not None and now - job.finished > self._keep]:
+            del self._latest[session]
+        if self._store is not None:
+            self._store.prune(self._keep)
+
+
+# GENERATE callback tracked by the request handled by this thread
+_request = threading.local()
+
+# queue shared by the GENERATE callback and the HTTP API
+job_queue = JobQueue(max_workers=int(os.environ.get('GVC_JOB_WORKERS', 2)),
+                     store=JobStore(JOB_DIR) if JOB_DIR else None)
+
+
+# identify the browser session issuing a request; None for requests without a session cookie (e.g. the first request of
+# a browser or clients ignoring cookies), whose jobs hence neither cancel nor get cancelled by other jobs
+def session_id() -> Optional[str]:
+    from flask import has_request_context, request
+
+    if not has_request_context():
+        return 'local'
+    return request.cookies.get(SESSION_COOKIE)
+
+
+# update function registered before update_inputs: tracks GENERATE callbacks so that a newer click from the same
+# session cancels the computation of the previous click at its next stage boundary
+def track_generate(inputs_updated: dict, btn_pressed: str, args: list):
+    end_request()
+    job = job_queue.track(session_id(), listed=False)
+    _current_job.set(job)
+    _request.job = job
+
+
+# finish the GENERATE callback tracked for the current request, if any; Dash runs callbacks in a copy of the request
+# context, so the job is kept per thread for the teardown handler of the request to find it
+def end_request(exc: Optional[BaseException] = None):
+    job = getattr(_request, 'job', None)
+    if job is not None:
+        _request.job = None
+        if job.cancelled:
+            job.set_status('cancelled')
+        elif exc is not None:
+            job.set_status('failed', repr(exc))
+        else:
+            job.set_status('done')
+        job.finish()
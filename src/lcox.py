@@ -0,0 +1,142 @@
+import hashlib
+import json
+from typing import Callable, Optional
+
+import pandas as pd
+from posted.calc_routines.LCOX import LCOX
+
+from src.precision import PRECISION
+from src.proc import (
+    elec_cases, ocf_assump, select_reheating, table_processes, transp_assump, transp_cost_by_subcase, wacc_assump,
+)
+
+
+# convert an assumption set (electricity prices and transport cost in the record format of the webapp tables, WACC in
+# percent by location, and OCF by default/ELH2) into inputs for evaluation; omitted assumptions keep their defaults
+def parse_assumption_set(inputs: dict, outputs: dict, assumption_set: dict) -> dict:
+    unknown = set(assumption_set) - {'elec_prices', 'transp_cost', 'wacc', 'ocf'}
+    if unknown:
+        raise ValueError(f"Unknown assumptions: {', '.join(sorted(unknown))}")
+
+    ret = {
+        'epdcases': inputs['epdcases'],
+        'transp_cost': outputs['transp_cost'],
+        'irate': inputs['other_assump']['irate'],
+        'ocf': None,
+        'keys': {
+            kind: assumption_key(assumption_set.get(kind))
+            for kind in ('elec_prices', 'transp_cost', 'wacc', 'ocf')
+        },
+    }
+
+    if assumption_set.get('elec_prices') is not None:
+        epdcases = pd.DataFrame.from_records(assumption_set['elec_prices'])
+        keys = ['epdcase', 'process']
+        if set(map(tuple, epdcases[keys].values)) != set(map(tuple, inputs['epdcases'][keys].values)):
+            raise ValueError('Electricity prices must be given for the same price cases and processes as the defaults.')
+        ret['epdcases'] = epdcases \
+            .filter(keys + ['RE-rich', 'RE-scarce']) \
+            .astype({c: 'pint[EUR/MWh]' for c in ('RE-scarce', 'RE-rich')})
+
+    if assumption_set.get('transp_cost') is not None:
+        transp_cost = pd.DataFrame.from_records(assumption_set['transp_cost']) \
+            .astype({'assump': 'float'})
+        transp_cost = transp_cost_by_subcase(transp_cost.filter(['traded', 'impsubcase', 'assump', 'unit']))
+        if not transp_cost.index.equals(outputs['transp_cost'].index) or \
+                set(transp_cost.columns) != set(outputs['transp_cost'].columns):
+            raise ValueError('Transport cost must be given for the same traded goods and subcases as the defaults.')
+        ret['transp_cost'] = transp_cost
+
+    if assumption_set.get('wacc') is not None:
+        ret['irate'] = inputs['other_assump']['irate'] | {
+            loc: float(val)
+            for loc, val in assumption_set['wacc'].items()
+            if loc in ('RE-rich', 'RE-scarce')
+        }
+
+    if assumption_set.get('ocf') is not None:
+        ret['ocf'] = inputs['other_assump']['ocf'] | {
+            k: float(val)
+            for k, val in assumption_set['ocf'].items()
+            if k in ('default', 'ELH2')
+        }
+
+    return ret
+
+
+# hash identifying an assumption (or set of assumptions) independent of key order
+def assumption_key(assumption) -> str:
+    return hashlib.sha256(json.dumps(assumption, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# evaluate levelised cost of production of a value chain for many parsed assumption sets in a single pass, by stacking
+# the assumptions of all sets along an additional index level `set`; all case-specific assumptions are applied to the
+# base table (as in process_inputs), so that no set inherits the default assumptions; intermediate assumption frames are
+# reused from the mapping `frames` if provided
+def evaluate_comm(inputs: dict, outputs: dict, comm: str, sets: list, frames: Optional[dict] = None) -> pd.DataFrame:
+    vc = inputs['value_chains'][comm]
+    proc_locs = outputs['procLocs'][comm]
+    base = outputs['base_tables'][comm]
+    processes = table_processes(base)
+    ocf_default = inputs['other_assump']['ocf']
+    keys = list(range(len(sets)))
+
+    def frame(kind: str, s: dict, func: Callable) -> pd.DataFrame:
+        if frames is None:
+            return func()
+        key = (kind, comm, s['keys'][kind])
+        if key not in frames:
+            frames[key] = func()
+        return frames[key]
+
+    assump_ocf = pd.concat([
+        frame('ocf', s, lambda: ocf_assump(processes, s['ocf'] or ocf_default))
+        for s in sets
+    ], keys=keys, names=['set']).droplevel(1)
+    assump_wacc = pd.concat([
+        frame('wacc', s, lambda: wacc_assump(proc_locs, s['irate']))
+        for s in sets
+    ], keys=keys, names=['set'])
+    assump_transp = pd.concat([
+        frame('transp_cost', s, lambda: transp_assump(vc, proc_locs, base, s['transp_cost']))
+        for s in sets
+    ], keys=keys, names=['set'])
+    assump_elec = pd.concat([
+        frame('elec_prices', s, lambda: elec_cases(s['epdcases'], proc_locs))
+        for s in sets
+    ], keys=keys, names=['set'])
+
+    table = base \
+        .assume(assump_ocf) \
+        .assume(assump_wacc) \
+        .assume(assump_transp)
+
+    return select_reheating(table) \
+        .assume(assump_elec) \
+        .calc(LCOX) \
+        .data['LCOX'] \
+        .pint.dequantify().droplevel('unit', axis=1) \
+        .stack(['process', 'type']).to_frame('value') \
+        .reset_index() \
+        .astype({'value': PRECISION}) \
+        .assign(commodity=comm)
+
+
+# evaluate levelised cost of production for a batch of assumption sets; returns one row per set, commodity, case, and
+# cost component (or per set, commodity, and case with the total cost if not detailed)
+def evaluate(inputs: dict, outputs: dict, assumption_sets: list, detailed: bool = False,
+             frames: Optional[dict] = None) -> pd.DataFrame:
+    sets = [parse_assumption_set(inputs, outputs, a) for a in assumption_sets]
+
+    ret = pd.concat([
+        evaluate_comm(inputs, outputs, comm, sets, frames)
+        for comm in inputs['value_chains']
+    ], ignore_index=True)
+
+    if not detailed:
+        ret = ret \
+            .groupby(['set', 'commodity', 'epdcase', 'impcase', 'impsubcase'], sort=False) \
+            .agg({'value': 'sum'}) \
+            .reset_index()
+
+    return ret
@@ -1,11 +1,21 @@
+import os
+import warnings
 from pathlib import Path
 
 import pandas as pd
+from posted.ted.TEDataFile import TEDataFile
 from posted.ted.TEDataSet import TEDataSet
 from posted.ted.TEProcessTreeDataTable import TEProcessTreeDataTable
 from posted.ted.Mask import Mask
 
-from src.utils import load_yaml_data_file, load_csv_data_file
+from src.metrics import set_gauge
+from src.precision import PRECISION, compact_tables
+from src.shared import thaw
+from src.utils import load_yaml_config_file, load_yaml_data_file, load_csv_data_file
+
+
+# drop parameter columns of POSTED tables that are not required by the calc routines (see config/calc_routines.yml)
+PRUNE_COLUMNS = os.environ.get('GVC_PRUNE_COLUMNS', '1') not in ('', '0', 'false')
 
 
 def load_data(inputs: dict):
@@ -36,7 +46,7 @@ def load_data(inputs: dict):
     inputs['value_chains'] = load_yaml_data_file('value_chains')
 
 
-def load_posted(inputs: dict):
+def load_posted(inputs: dict, keep_raw: bool = False, prune: bool = PRUNE_COLUMNS):
     # create list of technologies to load
     vcs = inputs['value_chains']
     techs = {k: {} for comm in vcs for k in vcs[comm]['graph'].keys()}
@@ -67,23 +77,92 @@ def load_posted(inputs: dict):
     techs['IDR'] |= {'mode': 'h2'}
     techs['EAF'] |= {'mode': 'primary'}
 
-    # load datatables from POSTED
+    # load datatables from POSTED, keeping the raw database files read by the datasets if requested (e.g. for dumping
+    # data supplements)
     inputs['proc_tables'] = {}
+    if keep_raw:
+        inputs['raw_tables'] = {}
     for tid, kwargs in techs.items():
         dac = {'load_other': [Path(__file__).parent.parent / 'data' / 'DAC-capex-custom.csv'], 'load_database': True} \
               if tid == 'DAC' else {}
-        t = TEDataSet(tid, **dac).generateTable(
+        ds = TEDataSet(tid, **dac)
+        if keep_raw:
+            inputs['raw_tables'][tid] = database_file(ds, tid, dac.get('load_other', [])).data
+        t = ds.generateTable(
             period=inputs['other_assump']['period'],
             agg=['src_ref'],
             **kwargs,
         )
         inputs['proc_tables'][tid] = t
 
+    # drop parameter columns not required by the calc routines and record the bytes saved per table
+    if prune:
+        required = required_types(inputs)
+        inputs['pruned_bytes'] = {}
+        for tid, t in inputs['proc_tables'].items():
+            saved = prune_table(t, required)
+            inputs['pruned_bytes'][tid] = saved
+            set_gauge('pruned_bytes', 'Bytes saved by dropping unused parameter columns of POSTED tables.', saved,
+                      table=tid)
+
     # generate process graph datatables
+    load_vc_tables(inputs)
+
+
+# the database file of a technology among the data files loaded by its dataset (i.e. not one of the other files loaded);
+# only loaded anew if the dataset does not hold on to its files; posted has no public API for the files of a dataset,
+# so this relies on its private attributes and warns when these are missing, as the file is then read twice
+def database_file(ds: TEDataSet, tid: str, load_other: list) -> TEDataFile:
+    other = {Path(p).resolve() for p in load_other}
+    for tedf in getattr(ds, '_loadedFiles', []):
+        path = getattr(tedf, '_path', None)
+        if path is None or Path(path).resolve() not in other:
+            return tedf
+    warnings.warn(f"Dataset {tid} does not expose its loaded files (posted API changed?); reading its database file "
+                  f"again.", RuntimeWarning)
+    tedf = TEDataFile(tid)
+    tedf.load()
+    return tedf
+
+
+# parameter types required by the calc routines configured for the value-chain tables: their parameters, and their flow
+# parameters for flows that are supplied within a value chain (including reference flows), priced, or traded; heat
+# counts as priced, as its demand is mapped to electricity
+def required_types(inputs: dict) -> set:
+    routines = load_yaml_config_file('calc_routines')
+    vcs = inputs['value_chains']
+    flows = {'elec', 'heat'} \
+        | {flow for vc in vcs.values() for suppliers in vc['graph'].values() for flow in suppliers} \
+        | {flow for vc in vcs.values() for flow in vc.get('imports', {})} \
+        | {t.refFlow for t in inputs['proc_tables'].values()} \
+        | {c.split(':', 1)[1] for c in inputs['other_prices'].columns if c.startswith('price:')} \
+        | set(inputs['transp_cost']['traded'])
+
+    return {param for r in routines.values() for param in r['params']} | {
+        f"{kind}:{flow}"
+        for r in routines.values()
+        for kind in r['flow_params']
+        for flow in flows
+    }
+
+
+# drop parameter columns of a datatable that are not required; returns the bytes saved
+def prune_table(table, required: set) -> int:
+    keep = table.data.columns.get_level_values('type').isin(list(required))
+    if keep.all():
+        return 0
+    before = int(table.data.memory_usage(index=True, deep=True).sum())
+    table.data = table.data.loc[:, keep]
+    return before - int(table.data.memory_usage(index=True, deep=True).sum())
+
+
+# combine process datatables into process graph datatables of all value chains
+def load_vc_tables(inputs: dict):
+    vcs = inputs['value_chains']
     inputs['vc_tables'] = {}
     for comm, details in vcs.items():
         graph = vcs[comm]['graph']
-        t = TEProcessTreeDataTable(*(inputs['proc_tables'][tid] for tid in graph), processGraph=graph)
+        t = TEProcessTreeDataTable(*(inputs['proc_tables'][tid] for tid in graph), processGraph=thaw(graph))
 
         # map heat to electricity
         all_cols = []
@@ -98,24 +177,12 @@ def load_posted(inputs: dict):
         inputs['vc_tables'][comm] = t
 
 
+# add other prices (all except electricity) to tables; ocf is assumed when processing inputs
 def load_other(inputs: dict):
-    # add OCF and other prices (all except electricity) to tables
     for comm, table in inputs['vc_tables'].items():
-        # other prices
-        assump_other = inputs['other_prices']
-
-        # ocf assumptions
-        assump_ocf = pd.DataFrame(
-            columns=pd.MultiIndex.from_product(
-                [table.data.columns.unique('process'), ['ocf']],
-                names=['process', 'type']
-            ),
-            index=[0],
-            data=inputs['other_assump']['ocf']['default'],
-        )
-        assump_ocf['ELH2', 'ocf'] = inputs['other_assump']['ocf']['ELH2']
+        inputs['vc_tables'][comm] = table.assume(inputs['other_prices'])
 
-        # add assumptions to tables
-        inputs['vc_tables'][comm] = table \
-            .assume(assump_ocf) \
-            .assume(assump_other)
+    # store tables in compact precision if configured
+    if PRECISION != 'float64':
+        inputs['proc_tables'] = compact_tables(inputs['proc_tables'], PRECISION)
+        inputs['vc_tables'] = compact_tables(inputs['vc_tables'], PRECISION)
@@ -0,0 +1,98 @@
+import hashlib
+import inspect
+import json
+import os
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Optional
+
+from src.utils import BASE_PATH
+
+
+# files that all figures depend on: input data, global config and config of the calc routines, and the code loading,
+# updating, and processing the data
+def _common_files() -> list[Path]:
+    return sorted((BASE_PATH / 'data').glob('*')) + [
+        BASE_PATH / 'config' / 'global.yml',
+        BASE_PATH / 'config' / 'calc_routines.yml',
+        BASE_PATH / 'src' / 'load.py',
+        BASE_PATH / 'src' / 'update.py',
+        BASE_PATH / 'src' / 'proc.py',
+        BASE_PATH / 'src' / 'lcox.py',
+        BASE_PATH / 'src' / 'utils.py',
+        BASE_PATH / 'src' / 'plots' / 'BasePlot.py',
+    ]
+
+
+# packages whose versions all figures depend on, and environment variables changing results with their defaults
+PACKAGES = ('posted', 'piw', 'plotly', 'kaleido')
+ENV_VARS = {'GVC_PRECISION': 'float64', 'GVC_PRUNE_COLUMNS': '1'}
+
+
+def _hash_files(h, files: list[Path]):
+    for path in files:
+        h.update(str(path.relative_to(BASE_PATH)).encode())
+        h.update(path.read_bytes())
+
+
+def _hash_environment(h):
+    for package in PACKAGES:
+        try:
+            v = version(package)
+        except PackageNotFoundError:
+            v = None
+        h.update(f"{package}=={v}\n".encode())
+    for var, default in ENV_VARS.items():
+        h.update(f"{var}={os.environ.get(var, default)}\n".encode())
+
+
+# content hash of the files, package versions, and environment that all figures depend on
+def inputs_hash() -> str:
+    h = hashlib.sha256()
+    _hash_files(h, _common_files())
+    _hash_environment(h)
+    return h.hexdigest()
+
+
+# content hash of every figure covering everything all figures depend on, its plot config, and the source of its plot
+# class
+def figure_hashes(plots: list) -> dict:
+    common = hashlib.sha256()
+    _hash_files(common, _common_files())
+    _hash_environment(common)
+
+    ret = {}
+    for plot_cls in plots:
+        h = common.copy()
+        _hash_files(h, [
+            BASE_PATH / 'config' / 'plots' / f"{plot_cls.__name__}.yml",
+            Path(inspect.getfile(plot_cls)).resolve(),
+        ])
+        for fig_name in plot_cls.figs:
+            ret[fig_name] = h.hexdigest()
+
+    return ret
+
+
+class Manifest:
+    def __init__(self, path: Path):
+        self._path = path
+        self._entries = json.loads(path.read_text()) if path.exists() else {}
+
+    # check if a figure was exported with the given hash (in all given formats) and all its files still exist; entries
+    # without files (e.g. from an export that failed to render) are stale
+    def is_current(self, fig_name: str, fig_hash: str, formats: Optional[list] = None) -> bool:
+        entry = self._entries.get(fig_name)
+        return entry is not None and entry['hash'] == fig_hash and bool(entry['files']) and \
+            all((self._path.parent / f).exists() for f in entry['files']) and \
+            all(any(Path(f).suffix == f".{fmt}" for f in entry['files']) for fmt in formats or [])
+
+    def update(self, fig_name: str, fig_hash: str, files: list[str]):
+        self._entries[fig_name] = {
+            'hash': fig_hash,
+            'files': sorted(os.path.relpath(Path(f).resolve(), self._path.parent.resolve()) for f in files),
+        }
+
+    def save(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._path.write_text(json.dumps(self._entries, indent=2, sort_keys=True))
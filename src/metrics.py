@@ -0,0 +1,330 @@
+import json
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from pathlib import Path
+from typing import Optional
+
+from src.utils import BASE_PATH
+
+
+# bucket boundaries of histograms (seconds for timings, bytes for allocations)
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ALLOC_BUCKETS = tuple(2 ** i * 1024 ** 2 for i in range(12))
+
+# allocation reports of generate and export runs: per-stage peak and net allocations, top allocating call sites, and
+# RSS; these take tracemalloc snapshots at the start and end of every stage and are hence only meant for diagnosis
+REPORT_ALLOC = bool(os.environ.get('GVC_ALLOC_REPORT'))
+REPORT_DIR = Path(os.environ.get('GVC_ALLOC_REPORT_DIR', BASE_PATH / 'profiles'))
+REPORT_TOP = int(os.environ.get('GVC_ALLOC_REPORT_TOP', 10))
+
+# peak allocations are only recorded when tracemalloc is tracing, as tracing slows down allocations noticeably
+if (os.environ.get('GVC_METRICS_ALLOC') or REPORT_ALLOC) and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+_metrics = {
+    'wall_seconds': ('Wall time per pipeline stage.', TIME_BUCKETS, {}),
+    'cpu_seconds': ('CPU time of the executing thread per pipeline stage.', TIME_BUCKETS, {}),
+    'peak_alloc_bytes': ('Peak traced memory allocation per pipeline stage.', ALLOC_BUCKETS, {}),
+}
+_lock = threading.Lock()
+
+# peaks of enclosing stages, so that nested stages resetting the tracemalloc peak do not hide it from outer stages
+_peaks: ContextVar[tuple] = ContextVar('peaks', default=())
+
+# whether stages in this context run concurrently with others in this process, in which case their peak allocation is
+# not recorded, as the tracemalloc peak is shared by all threads and resetting it would corrupt that of the others
+_concurrent: ContextVar[bool] = ContextVar('concurrent', default=False)
+
+# held by the outermost stage recording peak allocations in this process; stages starting on other threads meanwhile
+# (e.g. serial stages of concurrent requests) are treated as concurrent, for the same reason
+_peak_lock = threading.Lock()
+
+# allocation report of the run executed in this context, if any
+_report: ContextVar[Optional['AllocationReport']] = ContextVar('report', default=None)
+
+# allocation report started by the request handled by this thread, written when the request is torn down
+_request = threading.local()
+
+# observations recorded in this context instead of being added to the histograms of this process, e.g. in forked plot
+# workers, whose histograms are lost when they exit
+_recorded: ContextVar[Optional[list]] = ContextVar('recorded', default=None)
+
+
+# locks inherited by forked processes may be held by threads that do not exist in them
+def _after_fork():
+    global _lock, _peak_lock
+    _lock = threading.Lock()
+    _peak_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def observe(metric: str, name: str, value: float):
+    recorded = _recorded.get()
+    if recorded is not None:
+        recorded.append((metric, name, value))
+        return
+
+    _, buckets, hists = _metrics[metric]
+    with _lock:
+        if name not in hists:
+            hists[name] = Histogram(buckets)
+        hists[name].observe(value)
+
+
+# record the observations of the enclosed block, to be added to the histograms of another process via replay()
+@contextmanager
+def recording():
+    recorded = []
+    token = _recorded.set(recorded)
+    try:
+        yield recorded
+    finally:
+        _recorded.reset(token)
+
+
+def replay(recorded: list):
+    for metric, name, value in recorded:
+        observe(metric, name, value)
+
+
+# copy of the current context in which stages are marked as running concurrently
+def concurrent_context() -> Context:
+    ctx = copy_context()
+    ctx.run(_concurrent.set, True)
+    return ctx
+
+
+# record wall time, CPU time, and (if traced and not concurrent) peak allocation of a pipeline stage; usable as decorator
+@contextmanager
+def measure(name: str):
+    # nested stages are traced if their outermost stage is, which must hold the peak lock
+    tracing = tracemalloc.is_tracing() and not _concurrent.get()
+    owner = tracing and not _peaks.get() and _peak_lock.acquire(blocking=False)
+    tracing = tracing and (owner or bool(_peaks.get()))
+    report = _report.get() if tracing else None
+    if report is not None:
+        before = _snapshot()
+    if tracing:
+        base = tracemalloc.get_traced_memory()[0]
+        outer = _peaks.get()
+        if outer:
+            outer[-1][0] = max(outer[-1][0], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        token = _peaks.set(outer + ([0],))
+
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield
+    finally:
+        try:
+            observe('wall_seconds', name, time.perf_counter() - wall)
+            observe('cpu_seconds', name, time.thread_time() - cpu)
+
+            if tracing:
+                peak = max(_peaks.get()[-1][0], tracemalloc.get_traced_memory()[1])
+                _peaks.reset(token)
+                if outer:
+                    outer[-1][0] = max(outer[-1][0], peak)
+                observe('peak_alloc_bytes', name, max(peak - base, 0))
+
+            if report is not None:
+                report.add_stage(name, time.perf_counter() - wall, max(peak - base, 0),
+                                 tracemalloc.get_traced_memory()[0] - base, _snapshot().compare_to(before, 'lineno'))
+        finally:
+            if owner:
+                _peak_lock.release()
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ])
+
+
+# peak RSS of this process since it started
+def _max_rss() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class AllocationReport:
+    def __init__(self, name: str):
+        self.name = name
+        self.stages = []
+        self.started = time.strftime('%Y%m%d-%H%M%S')
+        self.rss_start = memory_usage().get('rss', 0)
+        self.max_rss_start = _max_rss()
+
+    # record a completed stage (nested stages are completed and hence listed before their enclosing stages)
+    def add_stage(self, name: str, wall: float, peak: int, net: int, stats: list):
+        stats = sorted(stats, key=lambda stat: -stat.size_diff)[:REPORT_TOP]
+        self.stages.append({
+            'stage': name,
+            'wall_seconds': wall,
+            'peak_alloc_bytes': peak,
+            'net_alloc_bytes': net,
+            'rss_bytes': memory_usage().get('rss', 0),
+            'max_rss_bytes': _max_rss(),
+            'top_sites': [
+                {
+                    'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    'size_diff_bytes': stat.size_diff,
+                    'count_diff': stat.count_diff,
+                }
+                for stat in stats if stat.size_diff > 0
+            ],
+        })
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'pid': os.getpid(),
+            'rss_start_bytes': self.rss_start,
+            'rss_end_bytes': memory_usage().get('rss', 0),
+            'max_rss_bytes': _max_rss(),
+            'max_rss_increase_bytes': _max_rss() - self.max_rss_start,
+            'stages': self.stages,
+        }
+
+    # write report as JSON and as human-readable text; returns the path of the text report
+    def write(self) -> Path:
+        report = self.to_dict()
+        REPORT_DIR.mkdir(parents=True, exist_ok=True)
+        stem = REPORT_DIR / f"{self.started}-{report['pid']}-{self.name}-alloc"
+        stem.with_suffix('.json').write_text(json.dumps(report, indent=2))
+
+        mib = 2 ** -20
+        lines = [
+            f"Allocation report of {self.name} (pid {report['pid']})",
+            f"RSS {report['rss_start_bytes'] * mib:.1f} -> {report['rss_end_bytes'] * mib:.1f} MiB, "
+            f"peak RSS {report['max_rss_bytes'] * mib:.1f} MiB "
+            f"(+{report['max_rss_increase_bytes'] * mib:.1f} MiB during run)",
+            '',
+        ]
+        for s in sorted(self.stages, key=lambda s: -s['peak_alloc_bytes']):
+            lines.append(f"{s['stage']}: peak {s['peak_alloc_bytes'] * mib:.1f} MiB, "
+                         f"net {s['net_alloc_bytes'] * mib:+.1f} MiB, {s['wall_seconds']:.3f} s")
+            for site in s['top_sites']:
+                lines.append(f"    {site['size_diff_bytes'] * mib:8.2f} MiB {site['count_diff']:+8d} blocks  "
+                             f"{site['site']}")
+        path = stem.with_suffix('.txt')
+        path.write_text('\n'.join(lines) + '\n')
+
+        return path
+
+
+# collect an allocation report for the enclosed run if enabled via GVC_ALLOC_REPORT
+@contextmanager
+def allocation_report(name: str):
+    if not REPORT_ALLOC or not tracemalloc.is_tracing():
+        yield None
+        return
+
+    report = AllocationReport(name)
+    token = _report.set(report)
+    try:
+        yield report
+    finally:
+        _report.reset(token)
+        report.write()
+
+
+# update function registered first: starts an allocation report for a GENERATE callback if enabled; written by
+# end_report(); Dash runs callbacks in a copy of the request context, so the report is also kept per thread for the
+# teardown handler of the request to find it
+def report_generate(inputs_updated: dict, btn_pressed: str, args: list):
+    end_report()
+    if REPORT_ALLOC and tracemalloc.is_tracing():
+        report = AllocationReport('callback')
+        _report.set(report)
+        _request.report = report
+
+
+# write the allocation report started for the current request, if any
+def end_report(exc: Optional[BaseException] = None):
+    report = getattr(_request, 'report', None)
+    if report is not None:
+        _request.report = None
+        report.write()
+
+
+# gauges set once per process (e.g. when loading data): {metric: (description, {label values: value})}
+_gauges = {}
+
+
+def set_gauge(metric: str, desc: str, value: float, **labels):
+    with _lock:
+        _gauges.setdefault(metric, (desc, {}))[1][tuple(sorted(labels.items()))] = value
+
+
+# render all metrics of this process in the Prometheus text exposition format
+def render() -> str:
+    pid = os.getpid()
+    lines = []
+    with _lock:
+        for metric, (desc, buckets, hists) in _metrics.items():
+            if not hists:
+                continue
+            lines.append(f"# HELP gvc_stage_{metric} {desc}")
+            lines.append(f"# TYPE gvc_stage_{metric} histogram")
+            for name, hist in sorted(hists.items()):
+                labels = f'stage="{name}",pid="{pid}"'
+                cumulative = 0
+                for le, count in zip(list(buckets) + ['+Inf'], hist.counts):
+                    cumulative += count
+                    lines.append(f'gvc_stage_{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"gvc_stage_{metric}_sum{{{labels}}} {hist.sum}")
+                lines.append(f"gvc_stage_{metric}_count{{{labels}}} {hist.count}")
+
+        for metric, (desc, values) in _gauges.items():
+            lines.append(f"# HELP gvc_{metric} {desc}")
+            lines.append(f"# TYPE gvc_{metric} gauge")
+            for labels, value in sorted(values.items()):
+                labels = ','.join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f'gvc_{metric}{{{labels},pid="{pid}"}} {value}')
+
+    for kind, value in memory_usage().items():
+        lines.append(f"# TYPE gvc_process_{kind}_bytes gauge")
+        lines.append(f'gvc_process_{kind}_bytes{{pid="{pid}"}} {value}')
+
+    return '\n'.join(lines) + '\n'
+
+
+# memory of this process from /proc (Linux only): resident, proportional, and unique set size, the latter being the
+# memory not shared with other processes, e.g. with the master process that workers were forked from
+def memory_usage() -> dict:
+    fields = {'Rss': 'rss', 'Pss': 'pss', 'Private_Clean': 'uss', 'Private_Dirty': 'uss'}
+    ret = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in fields:
+                    ret[fields[key]] = ret.get(fields[key], 0) + int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return ret
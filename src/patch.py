@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+from plotly.utils import PlotlyJSONEncoder
+
+from src.plots.BasePlot import BasePlot
+
+
+# deliver GENERATE results as partial figure updates through a callback of our own instead of the one of piw
+PATCH_UPDATES = os.environ.get('GVC_PATCH_UPDATES', '0') not in ('', '0', 'false')
+
+# ids of the store holding digests of the figures shown in the browser, of the store holding the ID of the running
+# generate job, of the interval polling that job for figures, and of the element showing why that job failed
+STATE_ID = 'patch-state'
+JOB_ID = 'generate-job'
+POLL_ID = 'generate-poll'
+ERROR_ID = 'generate-error'
+
+# milliseconds between polls for figures of the running generate job
+POLL_INTERVAL = 300
+
+# trace attributes holding the data that depend on user inputs; all other trace attributes and the layout form the
+# skeleton of a figure
+DATA_KEYS = ('x', 'y', 'z', 'text', 'customdata')
+
+
+# id of the graph component showing a figure in the webapp
+def graph_id(fig_name: str) -> str:
+    return fig_name
+
+
+def _digest(obj) -> str:
+    return hashlib.sha256(json.dumps(obj, cls=PlotlyJSONEncoder, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# split a figure in plotly JSON format into its skeleton and the data of its traces
+def _split(fig: dict) -> tuple:
+    traces = fig.get('data', [])
+    skeleton = {
+        'data': [{k: v for k, v in trace.items() if k not in DATA_KEYS} for trace in traces],
+        'layout': fig.get('layout', {}),
+    }
+    data = [{k: trace[k] for k in DATA_KEYS if k in trace} for trace in traces]
+    return skeleton, data
+
+
+def _merge(skeleton: dict, data: list) -> dict:
+    return {
+        'data': [trace | trace_data for trace, trace_data in zip(skeleton['data'], data)],
+        'layout': skeleton['layout'],
+    }
+
+
+# decorated figure skeletons by plot class and target; decoration only depends on the layout and trace attributes
+# produced by plot(), so it is skipped whenever these match the previous run and the new trace data are merged into the
+# skeleton decorated back then; plot classes that can record recipes of their figures (see BasePlot.plot_recipes) are
+# not even built then, as the recipe identifies the skeleton and holds the trace data
+class FigureSkeletons:
+    def __init__(self):
+        self._skeletons = {}
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    # the lock inherited by a forked process may be held by a thread that does not exist in it
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    # produce the (decorated) figures of a single plot class in plotly JSON format
+    def produce(self, plot_cls: type, inputs: dict, outputs: dict, target: str = 'webapp') -> dict:
+        plot = BasePlot.instance(plot_cls, target)
+        cached = self.get(plot_cls, target)
+
+        recipes = plot.plot_recipes(inputs, outputs, list(plot_cls.figs))
+        if recipes is not None:
+            split = {
+                fig_name: _split({'data': recipe.traces, 'layout': {}})
+                for fig_name, recipe in recipes.items()
+                if recipe is not None
+            }
+            key = _digest({fig_name: [recipe.calls, split[fig_name][0]] for fig_name, recipe in recipes.items()
+                           if recipe is not None})
+            if cached is not None and cached[0] == key:
+                return {
+                    fig_name: _merge(cached[1][fig_name], split[fig_name][1]) if recipe is not None else None
+                    for fig_name, recipe in recipes.items()
+                }
+
+        subfigs = plot.plot(inputs, outputs, list(plot_cls.figs))
+        split = {
+            fig_name: _split(fig.to_plotly_json())
+            for fig_name, fig in subfigs.items()
+            if fig is not None
+        }
+        if recipes is None:
+            key = _digest({fig_name: skeleton for fig_name, (skeleton, _) in split.items()})
+
+        if cached is None or cached[0] != key:
+            plot._decorate(inputs, outputs, subfigs)
+            decorated = {
+                fig_name: _split(fig.to_plotly_json())[0]
+                for fig_name, fig in subfigs.items()
+                if fig is not None
+            }
+            if any(len(decorated[fig_name]['data']) != len(data) for fig_name, (_, data) in split.items()):
+                raise RuntimeError(f"Decoration of {plot_cls.__name__} must not add or remove traces.")
+            cached = (key, decorated)
+            self.set(plot_cls, target, cached)
+
+        return {
+            fig_name: _merge(cached[1][fig_name], split[fig_name][1]) if fig is not None else None
+            for fig_name, fig in subfigs.items()
+        }
+
+    # digest and decorated skeletons of a plot class and target, e.g. to send those of a worker process to its parent
+    def get(self, plot_cls: type, target: str) -> Optional[tuple]:
+        with self._lock:
+            return self._skeletons.get((plot_cls, target))
+
+    def set(self, plot_cls: type, target: str, cached: Optional[tuple]):
+        if cached is None:
+            return
+        with self._lock:
+            self._skeletons[plot_cls, target] = cached
+
+
+skeletons = FigureSkeletons()
+
+
+# updates bringing the figures shown in the browser up to date, given the digests of what it shows: a Patch replacing
+# only changed trace data if the browser holds the same skeleton, the full figure otherwise; returns updates and the
+# new digests
+def figure_updates(figs: dict, state: Optional[dict]) -> tuple:
+    from dash import Patch, no_update
+
+    state = state or {}
+    updates, new_state = {}, {}
+    for fig_name, fig in figs.items():
+        if fig is None:
+            updates[fig_name] = no_update
+            continue
+
+        skeleton, data = _split(fig)
+        digests = {
+            'skeleton': _digest(skeleton),
+            'data': [{k: _digest(v) for k, v in trace_data.items()} for trace_data in data],
+        }
+        new_state[fig_name] = digests
+
+        previous = state.get(fig_name)
+        if previous is None or previous['skeleton'] != digests['skeleton']:
+            updates[fig_name] = fig
+            continue
+
+        patch = Patch()
+        changed = False
+        for i, (trace_data, trace_digests, trace_previous) in enumerate(zip(data, digests['data'], previous['data'])):
+            for k, v in trace_data.items():
+                if trace_previous.get(k) != trace_digests[k]:
+                    patch['data'][i][k] = v
+                    changed = True
+            for k in set(trace_previous) - set(trace_data):
+                del patch['data'][i][k]
+                changed = True
+        updates[fig_name] = patch if changed else no_update
+
+    return updates, new_state
+
+
+# update function registered first: drops GENERATE clicks in the callback of piw if they are handled by the patch
+# callbacks instead (the initial figures are still produced by piw)
+def defer_generate(inputs_updated: dict, btn_pressed: str, args: list):
+    from dash.exceptions import PreventUpdate
+
+    if PATCH_UPDATES and args and args[0]:
+        raise PreventUpdate()
+
+
+# register callbacks delivering figures progressively: a GENERATE click submits a generate job for all plots, and one
+# callback per page of the webapp polls it and sends updates of the figures of that page as soon as their plot is done
+def register_patch_callbacks(plots: list, generate_args: list):
+    from dash import Input, Output, Patch, State, callback, no_update
+
+    from src.jobs import job_queue, session_id
+    from src.pipeline import generate
+
+    def submit_generate(*args):
+        job = job_queue.submit(session_id(), generate, plots, list(args), 'webapp', False, skeletons)
+        return job.id, False, None
+
+    callback(
+        Output(JOB_ID, 'data'),
+        Output(POLL_ID, 'disabled', allow_duplicate=True),
+        Output(ERROR_ID, 'children', allow_duplicate=True),
+        *generate_args,
+        prevent_initial_call=True,
+    )(submit_generate)
+
+    pages = {}
+    for plot_cls in plots:
+        for fig_name, fig_specs in plot_cls.figs.items():
+            for page in fig_specs.get('display', ['']):
+                pages.setdefault(page, []).append(fig_name)
+
+    for fig_names in pages.values():
+        def poll_figures(n_intervals: int, job_id: Optional[str], state: Optional[dict], fig_names=fig_names):
+            job = job_queue.get(job_id) if job_id else None
+            if job is None:
+                return *[no_update for _ in fig_names], no_update, True, no_update
+
+            # figures published before the job was seen finished are complete, so polling can stop afterwards
+            state = state or {}
+            finished = job.finished is not None
+            figs = {
+                fig_name: fig
+                for fig_name, fig in job.figures.items()
+                if fig_name in fig_names and state.get(fig_name, {}).get('job') != job.id
+            }
+            updates, new_state = figure_updates(figs, state)
+
+            state_patch = Patch()
+            for fig_name, digests in new_state.items():
+                state_patch[fig_name] = digests | {'job': job.id}
+
+            # figures of plots done before a failure are still shown, alongside the error
+            error = f"Generating the figures failed: {job.error}" if job.status == 'failed' else no_update
+
+            return *[updates.get(fig_name, no_update) for fig_name in fig_names], state_patch, finished, error
+
+        callback(
+            *[Output(graph_id(fig_name), 'figure', allow_duplicate=True) for fig_name in fig_names],
+            Output(STATE_ID, 'data', allow_duplicate=True),
+            Output(POLL_ID, 'disabled', allow_duplicate=True),
+            Output(ERROR_ID, 'children', allow_duplicate=True),
+            Input(POLL_ID, 'n_intervals'),
+            State(JOB_ID, 'data'),
+            State(STATE_ID, 'data'),
+            prevent_initial_call=True,
+        )(poll_figures)
@@ -0,0 +1,174 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+
+from src.metrics import allocation_report, concurrent_context, recording, replay
+from src.patch import FigureSkeletons
+from src.plots.BasePlot import BasePlot
+from src.profiling import profiled
+from src.proc import process_inputs
+from src.shared import overlay
+from src.stages import current_job, recorded_stages
+from src.update import update_inputs
+
+
+# number of plot classes produced concurrently per generate run, and how: on threads (`thread`, default), on worker
+# processes forked from the current process (`process`, meant for headless entry points such as the daemon, as forking
+# a web server with running threads is fragile), or one after another (`serial`)
+PLOT_WORKERS = int(os.environ.get('GVC_PLOT_WORKERS', 4))
+PLOT_EXECUTOR = os.environ.get('GVC_PLOT_EXECUTOR', 'thread')
+
+# seconds to wait for the figures of all plot classes of a run produced by threads or worker processes
+PLOT_TIMEOUT = float(os.environ.get('GVC_PLOT_TIMEOUT', 300))
+
+# default inputs as loaded by the webapp and outputs processed from them
+_default_inputs: Optional[dict] = None
+_default_outputs: Optional[dict] = None
+_lock = threading.Lock()
+
+
+# load function registered last: keeps a reference to the loaded default inputs for headless generate runs
+def keep_defaults(inputs: dict):
+    global _default_inputs
+    _default_inputs = inputs
+
+
+def default_inputs() -> dict:
+    if _default_inputs is None:
+        raise RuntimeError('Default inputs have not been loaded yet.')
+    return _default_inputs
+
+
+# outputs of processing the default inputs, computed once on first use
+def default_outputs() -> dict:
+    global _default_outputs
+    with _lock:
+        if _default_outputs is None:
+            outputs = {}
+            process_inputs(default_inputs(), outputs)
+            _default_outputs = outputs
+    return _default_outputs
+
+
+# produce the (decorated) figures of a single plot class
+def produce(plot_cls: type, inputs: dict, outputs: dict, target: str = 'webapp') -> dict:
+    plot = BasePlot.instance(plot_cls, target)
+    subfigs = plot.plot(inputs, outputs, list(plot_cls.figs))
+    plot._decorate(inputs, outputs, subfigs)
+    return subfigs
+
+
+# pool of threads producing plots, shared by all generate runs of this process
+_plot_pool = ThreadPoolExecutor(max_workers=max(PLOT_WORKERS, 1), thread_name_prefix='gvc-plot')
+
+# arguments of the plots produced by forked worker processes, which inherit them instead of receiving them pickled
+_forked: Optional[tuple] = None
+_fork_lock = threading.Lock()
+
+
+# figures of a plot class produced by a forked worker, together with its decorated skeletons for the parent to cache,
+# and the stages and metric observations of the plot, which the parent adds to its job and histograms
+def _produce_forked(plot_cls: type) -> tuple:
+    inputs, outputs, target, skeletons = _forked
+    with recorded_stages() as stages, recording() as observations:
+        if skeletons is None:
+            figs, cached = produce(plot_cls, inputs, outputs, target), None
+        else:
+            figs, cached = skeletons.produce(plot_cls, inputs, outputs, target), skeletons.get(plot_cls, target)
+    return figs, cached, stages, observations
+
+
+# results of futures by plot class, passed to `on_result` as soon as they are done and returned in the order submitted;
+# `receive` turns the result of a future into the figures of its plot class; raises TimeoutError if not all are done
+# within PLOT_TIMEOUT
+def _collect(futures: dict, on_result: Optional[Callable], receive: Optional[Callable] = None) -> list:
+    results = {}
+    for f in as_completed(futures, timeout=PLOT_TIMEOUT):
+        result = f.result()
+        results[f] = receive(futures[f], result) if receive is not None else result
+        if on_result is not None:
+            on_result(results[f])
+    return [results[f] for f in futures]
+
+
+# produce the figures of several plot classes concurrently, as they only read inputs and outputs; the figures of each
+# plot class are passed to `on_result` as soon as they are done, and returned in the order of the plot classes
+def produce_all(plots: list, inputs: dict, outputs: dict, target: str = 'webapp',
+                skeletons: Optional[FigureSkeletons] = None, executor: str = PLOT_EXECUTOR,
+                on_result: Optional[Callable] = None) -> dict:
+    global _forked
+    func = skeletons.produce if skeletons is not None else produce
+
+    if executor == 'serial' or PLOT_WORKERS <= 1 or len(plots) <= 1:
+        results = []
+        for plot_cls in plots:
+            results.append(func(plot_cls, inputs, outputs, target))
+            if on_result is not None:
+                on_result(results[-1])
+    elif executor == 'thread':
+        # each plot runs in a copy of the current context, so that stages are reported to the current job; as plots run
+        # concurrently, their stages do not record peak allocations
+        futures = {
+            _plot_pool.submit(concurrent_context().run, func, plot_cls, inputs, outputs, target): plot_cls
+            for plot_cls in plots
+        }
+        results = _collect(futures, on_result)
+    elif executor == 'process':
+        # workers are forked while submitting, so they see the arguments of this run; figures are sent back pickled,
+        # together with the skeletons decorated by the worker, which are cached in this process for later runs, and the
+        # stages and metrics of the worker, which are reported to the current job and histograms of this process
+        job = current_job()
+
+        def receive(plot_cls: type, result: tuple) -> dict:
+            figs, cached, stages, observations = result
+            replay(observations)
+            if job is not None:
+                for name, started, finished in stages:
+                    job.add_stage(name, started, finished)
+            if skeletons is not None:
+                skeletons.set(plot_cls, target, cached)
+            return figs
+
+        # a worker that hangs is left behind instead of blocking the run
+        pool = ProcessPoolExecutor(max_workers=min(PLOT_WORKERS, len(plots)),
+                                   mp_context=multiprocessing.get_context('fork'))
+        try:
+            with _fork_lock:
+                _forked = (inputs, outputs, target, skeletons)
+                futures = {pool.submit(_produce_forked, plot_cls): plot_cls for plot_cls in plots}
+                _forked = None
+            results = _collect(futures, on_result, receive)
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+    else:
+        raise ValueError(f"Unknown plot executor: {executor}")
+
+    figs = {}
+    for result in results:
+        figs |= result
+    return figs
+
+
+# run the full generate pipeline (update, proc, plots) on top of the default inputs; with figure skeletons given,
+# figures are returned in plotly JSON format with decoration reused from previous runs; plots run one after another when
+# profiled or reporting allocations, as profiles only cover the calling thread and stage allocations would overlap;
+# figures are published to the current job as soon as each plot class is done
+def generate(plots: list, args: list, target: str = 'webapp', profile: bool = False,
+             skeletons: Optional[FigureSkeletons] = None) -> dict:
+    with profiled('generate', force=profile) as active_profile, allocation_report('generate') as report:
+        inputs = overlay(default_inputs())
+        update_inputs(inputs, 'simple-update', args)
+
+        outputs = {}
+        process_inputs(inputs, outputs)
+
+        job = current_job()
+        figs = produce_all(plots, inputs, outputs, target, skeletons,
+                           executor='serial' if active_profile is not None or report is not None else PLOT_EXECUTOR,
+                           on_result=job.publish if job is not None else None)
+
+    return figs
@@ -1,4 +1,5 @@
 from abc import ABC
+from contextvars import ContextVar
 from string import ascii_lowercase
 from typing import Optional, Final
 
@@ -7,14 +8,93 @@ from plotly.colors import hex_to_rgb
 
 from piw import AbstractPlot
 
+from src.stages import stage
+from src.metrics import measure
+
 
 inch_per_pt: Final[float] = 1 / 72
 
+# whether plot() records recipes of its figures in this context instead of building them
+_recording: ContextVar[bool] = ContextVar('recording', default=False)
+
+
+# stand-in for a plotly figure created via make_subplots that records the calls building it instead of building it; the
+# calls (with the traces stripped of their data, see src.patch) identify the skeleton of the figure, so that its data
+# can be merged into the cached skeleton whenever these match the calls of the run that built it
+class FigureRecipe:
+    def __init__(self, **kwargs):
+        self.calls = [('make_subplots', (), kwargs)]
+        self.traces = []
+
+    def add_trace(self, trace, *args, **kwargs):
+        self.traces.append(trace.to_plotly_json())
+        self.calls.append(('add_trace', args, kwargs))
+        return self
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return record
+
 
 class BasePlot(AbstractPlot, ABC):
     _add_subfig_name: bool = False
     _add_subfig_name_dict: Optional[dict] = None
+    _instances: dict = {}
+
+    # whether plot() only builds figures via _make_subplots() and only adds to them (without reading them back), so that
+    # it can record recipes of its figures instead
+    _recipes: bool = False
+
+    def __init__(self, *args, **kwargs):
+        super(BasePlot, self).__init__(*args, **kwargs)
+
+        # register instance created by the webapp for use in headless generate runs
+        BasePlot._instances[type(self), self._target] = self
+
+    def __init_subclass__(cls, **kwargs):
+        super(BasePlot, cls).__init_subclass__(**kwargs)
+
+        # instrument data preparation, plotting, and decoration of each plot class
+        for method in ('_prepare', '_prepare_data', 'plot', '_decorate'):
+            if method in cls.__dict__:
+                setattr(cls, method, measure(f"{cls.__name__}.{method}")(cls.__dict__[method]))
+
+        # report each plot as a separate pipeline stage
+        if 'plot' in cls.__dict__:
+            cls.plot = stage(cls.__name__)(cls.plot)
+
+    @staticmethod
+    def instance(plot_cls: type, target: str) -> 'BasePlot':
+        if (plot_cls, target) not in BasePlot._instances:
+            raise RuntimeError(f"No instance of {plot_cls.__name__} has been created for target '{target}'.")
+        return BasePlot._instances[plot_cls, target]
+
+    # figure for plot() to build, or a recipe of it when recording
+    @staticmethod
+    def _make_subplots(**kwargs):
+        if _recording.get():
+            return FigureRecipe(**kwargs)
+
+        from plotly.subplots import make_subplots
+        return make_subplots(**kwargs)
+
+    # recipes of the figures of plot() instead of the figures themselves; None if not supported by the plot class
+    def plot_recipes(self, inputs: dict, outputs: dict, subfig_names: list) -> Optional[dict]:
+        if not self._recipes:
+            return None
+
+        token = _recording.set(True)
+        try:
+            return self.plot(inputs, outputs, subfig_names)
+        finally:
+            _recording.reset(token)
 
+    @measure('BasePlot._decorate')
     def _decorate(self, inputs: dict, outputs: dict, subfigs: dict):
         for subfig_name, subfig_plot in subfigs.items():
             if subfig_plot is None:
@@ -1,15 +1,14 @@
 import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from posted.calc_routines.LCOX import LCOX
 from posted.config.config import flowTypes, techs
 
-from src.utils import load_yaml_config_file, load_yaml_plot_config_file
+from src.utils import load_yaml_config_file, lazy_plot_config
 from src.plots.BasePlot import BasePlot
 
 
 class LevelisedPlot(BasePlot):
-    figs, cfg = load_yaml_plot_config_file('LevelisedPlot')
+    figs, cfg = lazy_plot_config('LevelisedPlot')
     _add_subfig_name = True
 
     def _decorate(self, inputs: dict, outputs: dict, subfigs: dict):
@@ -35,7 +34,7 @@ class LevelisedPlot(BasePlot):
         commodities = list(inputs['value_chains'].keys())
 
         # create figure
-        fig = make_subplots(
+        fig = self._make_subplots(
             cols=len(commodities),
             horizontal_spacing=0.04,
         )
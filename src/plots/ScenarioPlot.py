@@ -2,20 +2,22 @@ from string import ascii_lowercase
 
 import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from posted.calc_routines.LCOX import LCOX
 
-from src.utils import load_yaml_config_file, load_yaml_plot_config_file
+from src.utils import load_yaml_config_file, lazy_plot_config
 from src.plots.BasePlot import BasePlot
 
 
 class ScenarioPlot(BasePlot):
-    figs, cfg = load_yaml_plot_config_file('ScenarioPlot')
+    figs, cfg = lazy_plot_config('ScenarioPlot')
     _add_subfig_name = True
     _add_subfig_name_dict = {i: ascii_lowercase[i] for i in range(4)}
 
     def plot(self, inputs: dict, outputs: dict, subfig_names: list) -> dict:
+        # plotly express pulls in a large part of plotly, so only import it when actually plotting
+        import plotly.express as px
+
         plot_data = self._prepare(inputs, outputs)
         plot_data['scenario_name'] = plot_data['scenario'].map(self.cfg['scenario_names'])
 
@@ -3,15 +3,14 @@ from string import ascii_lowercase
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from posted.calc_routines.LCOX import LCOX
 
-from src.utils import load_yaml_plot_config_file
+from src.utils import lazy_plot_config
 from src.plots.BasePlot import BasePlot
 
 
 class SensitivityPlot(BasePlot):
-    figs, cfg = load_yaml_plot_config_file('SensitivityPlot')
+    figs, cfg = lazy_plot_config('SensitivityPlot')
     _add_subfig_name = True
     _add_subfig_name_dict = {b: ascii_lowercase[a] for a, b in enumerate([0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 11, 12, 13])}
 
@@ -29,7 +28,7 @@ class SensitivityPlot(BasePlot):
         commodities = list(inputs['value_chains'].keys())
 
         # create figure
-        fig = make_subplots(
+        fig = self._make_subplots(
             rows=5,
             cols=len(commodities),
             horizontal_spacing=0.035,
@@ -2,15 +2,14 @@ import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.colors import hex_to_rgb
-from plotly.subplots import make_subplots
 from posted.calc_routines.LCOX import LCOX
 
-from src.utils import load_yaml_config_file, load_yaml_plot_config_file
+from src.utils import load_yaml_config_file, lazy_plot_config
 from src.plots.BasePlot import BasePlot
 
 
 class TotalCostPlot(BasePlot):
-    figs, cfg = load_yaml_plot_config_file('TotalCostPlot')
+    figs, cfg = lazy_plot_config('TotalCostPlot')
     _add_subfig_name = True
 
     def _decorate(self, inputs: dict, outputs: dict, subfigs: dict):
@@ -27,7 +26,7 @@ class TotalCostPlot(BasePlot):
         commodities = list(inputs['value_chains'].keys())
 
         # create figure
-        fig = make_subplots(
+        fig = self._make_subplots(
             rows=2,
             cols=len(commodities),
             horizontal_spacing=0.035,
@@ -184,8 +183,11 @@ class TotalCostPlot(BasePlot):
             1.05 * max(data_range['xmax'], data_range['ymax']),
         ]
 
-        x = np.linspace(*plot_range, self.cfg['bottom']['samples'])
-        y = np.linspace(*plot_range, self.cfg['bottom']['samples'])
+        # savings are linear in x and y, so by default only the corners of the plot range are sent, from which the
+        # bilinear interpolation of zsmooth='best' reproduces the plane exactly
+        samples = self.cfg['bottom']['samples'] if self.cfg['bottom']['heatmap'] == 'dense' else 2
+        x = np.linspace(*plot_range, samples)
+        y = np.linspace(*plot_range, samples)
         vx, vy = np.meshgrid(x, y)
         base_total = lcox \
             .reorder_levels(['impcase', 'impsubcase', 'epdcase', 'process', 'type']) \
@@ -0,0 +1,46 @@
+import copy
+import os
+
+import numpy as np
+import pandas as pd
+from pint_pandas import PintArray
+
+
+# storage precision of the large tables (process and value-chain datatables, processed tables, and LCOX results):
+# `float64` (default) or `float32`, which halves their memory for deployments running many workers or large sweeps
+PRECISION = os.environ.get('GVC_PRECISION', 'float64')
+if PRECISION not in ('float64', 'float32'):
+    raise ValueError(f"Unknown precision: {PRECISION}")
+
+
+# array of a column with floats cast to the given precision; pint arrays are rebuilt from their cast magnitudes
+def _compact_column(s: pd.Series, dtype: str):
+    arr = s.array
+    if isinstance(arr, PintArray):
+        magnitudes = np.asarray(arr.quantity.magnitude)
+        if magnitudes.dtype.kind == 'f' and magnitudes.dtype != dtype:
+            return PintArray(magnitudes.astype(dtype), dtype=arr.dtype.units)
+        return arr
+    if s.dtype.kind == 'f':
+        return s.to_numpy(dtype=dtype)
+    return arr
+
+
+def compact_frame(df: pd.DataFrame, dtype: str = 'float32') -> pd.DataFrame:
+    ret = pd.DataFrame({i: _compact_column(df.iloc[:, i], dtype) for i in range(df.shape[1])}, index=df.index)
+    ret.columns = df.columns
+    return ret
+
+
+# copies of datatables with their data stored in the given precision
+def compact_tables(tables: dict, dtype: str = 'float32') -> dict:
+    ret = {}
+    for tid, table in tables.items():
+        ret[tid] = copy.copy(table)
+        ret[tid].data = compact_frame(table.data, dtype)
+    return ret
+
+
+# memory of the data of datatables in bytes
+def tables_nbytes(tables: dict) -> int:
+    return sum(int(table.data.memory_usage(index=True, deep=True).sum()) for table in tables.values())
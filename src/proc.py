@@ -3,8 +3,14 @@ import pandas as pd
 
 from posted.units.units import ureg
 
+from src.precision import PRECISION, compact_tables
+from src.stages import stage
+from src.metrics import measure
+
 
 # process cases
+@stage('proc')
+@measure('process_inputs')
 def process_inputs(inputs: dict, outputs: dict):
     vcs = inputs['value_chains']
 
@@ -15,136 +21,200 @@ def process_inputs(inputs: dict, outputs: dict):
         .sort_values(by='epd')
 
     # calculate transport cost outputs from inputs
-    outputs['transp_cost'] = inputs['transp_cost'] \
-        .set_index(['traded', 'impsubcase', 'unit']) \
-        .transpose() \
-        .stack('impsubcase') \
-        .pint.quantify() \
-        .droplevel(0)
+    outputs['transp_cost'] = transp_cost_by_subcase(inputs['transp_cost'])
 
     # associate correct RE prices with processes
     outputs['cases'] = {}
+    outputs['base_tables'] = {}
     outputs['tables'] = {}
     outputs['procLocs'] = {}
     for comm in vcs:
-        locs = vcs[comm]['locations']
-
         # get dataframe of process locations
-        proc_locs = pd.DataFrame(data=[
-                {
-                    'impcase': f"Case {i}" if i else 'Base Case',
-                    **{
-                        p: loc
-                        for loc, pgList in {'RE-rich': locs[:i], 'RE-scarce': locs[i:]}.items()
-                        for pg in pgList for p in pg
-                    }
-                }
-                for i in range(4)
-            ]) \
-            .set_index('impcase') \
-            .rename_axis('process', axis=1)
+        proc_locs = process_locations(vcs[comm]['locations'])
         outputs['procLocs'][comm] = proc_locs
 
         # get dataframe mapping epdcases and associated elec prices to processes
-        proc_locs_stacked = proc_locs \
-            .stack() \
-            .swaplevel(0, 1, 0) \
-            .to_frame('location') \
-            .reset_index() \
-            .set_index(['process', 'location'])
-
-        # electricity-price difference cases by process
-        epdcases_by_proc = pd.concat(
-            [inputs['epdcases'].query("process!='OTHER'")] +
-            [inputs['epdcases'].query("process=='OTHER'").assign(process=p) for p in proc_locs.columns if p != 'ELH2']
-        )
-
-        outputs['cases'][comm] = epdcases_by_proc \
-            .set_index(['process', 'epdcase']) \
-            .rename_axis('location', axis=1) \
-            .stack() \
-            .to_frame('price:elec') \
-            .merge(proc_locs_stacked, left_index=True, right_index=True) \
-            .reset_index() \
-            .drop(columns='location') \
-            .set_index(['impcase', 'epdcase', 'process']) \
-            .rename_axis('type', axis=1) \
-            .unstack('process')
-
-        # financing assumptions
-        assump_wacc = proc_locs \
-            .replace('RE-scarce', inputs['other_assump']['irate']['RE-scarce']) \
-            .replace('RE-rich', inputs['other_assump']['irate']['RE-rich']) \
-            .astype(float) \
-            .apply(lambda x: x/100.0) \
-            .assign(type='wacc') \
-            .set_index('type', append=True) \
-            .unstack('type')
-        table = inputs['vc_tables'][comm] \
-            .assume(assump_wacc) \
-            .assume({'lifetime': 18.0 * ureg('a')})
-
-        # insert dummy process
-        new_data = table.data.copy()
-        new_data['value', f"demand_sc:{table.refFlow}", 'DUMMY'] = 1.0
-        table.data = new_data
-
-        # find goods in value chain that have transport cost
-        traded = [
-            t.split(':')[-1] for t in outputs['transp_cost'].columns
-            if table.data.columns.unique(level=1).str.match(fr"^demand(_sc)?:{t.split(':')[-1]}$").any()
-        ]
-
-        # create dataframe containing transport cost assumptions
-        assump_transp = pd.DataFrame(
-                index=[f"Case {i}" if i else 'Base Case' for i in range(4)],
-                columns=traded,
-                data=np.nan,
-            ) \
-            .rename_axis('impcase') \
-            .rename_axis('traded', axis=1)
-
-        # match traded goods to import cases
-        for p1, p1s in vcs[comm]['graph'].items():
-            for t, p2 in p1s.items():
-                if t in traded:
-                    assump_transp.loc[(proc_locs[p1] != proc_locs[p2]), t] = 1
-        assump_transp.loc['Case 3', table.refFlow] = 1
-        if comm == 'Steel':
-            assump_transp.loc[['Base Case', 'Case 1'], 'ironore'] = 1
-
-        # determine trade cost cases (including impsubcases)
-        trade_cost_cases = []
-        for impcase, row in assump_transp.iterrows():
-            trade_cost_case = pd.DataFrame(columns=['impcase'], data=[impcase])
-            for t in row.dropna().index.tolist():
-                tmp = outputs['transp_cost'] \
-                    .loc[:, t] \
-                    .dropna() \
-                    .to_frame() \
-                    .rename_axis(f"impsubcase_{t}") \
-                    .reset_index()
-                trade_cost_case = trade_cost_case.merge(tmp, how='cross').dropna(axis=1, how='all')
-            trade_cost_cases.append(trade_cost_case)
-        assump_transp = pd.concat(trade_cost_cases)
-        index_cols = [c for c in assump_transp if c not in traded]
-        assump_transp = assump_transp \
-            .fillna({c: '' for c in index_cols}) \
-            .set_index(index_cols) \
-            .rename(columns={c: f"transp:{c}" for c in traded}) \
-            .rename_axis('type', axis=1)
-        assump_transp.index = assump_transp.index \
-            .map(lambda i: (i[0], f"{i[0]}{i[1]}")) \
-            .rename(['impcase', 'impsubcase'])
+        outputs['cases'][comm] = elec_cases(inputs['epdcases'], proc_locs)
+
+        # table before case-specific assumptions, kept for batch evaluation of assumption sets
+        base = base_table(inputs['vc_tables'][comm])
+        outputs['base_tables'][comm] = base
+
+        # ocf and financing assumptions
+        table = base \
+            .assume(ocf_assump(table_processes(base), inputs['other_assump']['ocf'])) \
+            .assume(wacc_assump(proc_locs, inputs['other_assump']['irate']))
 
         # add trade cost assumptions to table
-        table = table.assume(assump_transp)
+        table = table.assume(transp_assump(vcs[comm], proc_locs, base, outputs['transp_cost']))
+
+        outputs['tables'][comm] = select_reheating(table)
+
+    # store processed tables in compact precision if configured
+    if PRECISION != 'float64':
+        outputs['base_tables'] = compact_tables(outputs['base_tables'], PRECISION)
+        outputs['tables'] = compact_tables(outputs['tables'], PRECISION)
+
+
+# value-chain table before any case-specific assumptions (ocf, financing, transport cost, electricity prices), with
+# lifetime and a dummy process consuming the final product added
+def base_table(vc_table):
+    table = vc_table.assume({'lifetime': 18.0 * ureg('a')})
+
+    new_data = table.data.copy()
+    new_data['value', f"demand_sc:{table.refFlow}", 'DUMMY'] = 1.0
+    table.data = new_data
+
+    return table
 
-        # associate reheating cases to impcases
-        if comm == 'Steel':
-            table.data = table.data \
-                .query(f"(reheating=='w/o reheating' & impcase!='Case 2') | "
-                       f"(reheating=='w/ reheating') & (impcase=='Case 2')") \
-                .droplevel(level='reheating')
 
-        outputs['tables'][comm] = table
+# processes of a table, excluding the dummy process
+def table_processes(table) -> pd.Index:
+    return table.data.columns.unique('process').drop('DUMMY', errors='ignore')
+
+
+# associate reheating cases to impcases
+def select_reheating(table):
+    if 'reheating' in table.data.index.names:
+        table.data = table.data \
+            .query(f"(reheating=='w/o reheating' & impcase!='Case 2') | "
+                   f"(reheating=='w/ reheating') & (impcase=='Case 2')") \
+            .droplevel(level='reheating')
+    return table
+
+
+# ocf assumptions for given processes, with a default value and a separate value for electrolysis
+def ocf_assump(processes: pd.Index, ocf: dict) -> pd.DataFrame:
+    assump_ocf = pd.DataFrame(
+        columns=pd.MultiIndex.from_product(
+            [processes, ['ocf']],
+            names=['process', 'type']
+        ),
+        index=[0],
+        data=ocf['default'],
+    )
+    assump_ocf['ELH2', 'ocf'] = ocf['ELH2']
+
+    return assump_ocf
+
+
+# convert transport cost inputs to quantities by traded good (columns) and impsubcase (rows)
+def transp_cost_by_subcase(transp_cost: pd.DataFrame) -> pd.DataFrame:
+    return transp_cost \
+        .set_index(['traded', 'impsubcase', 'unit']) \
+        .transpose() \
+        .stack('impsubcase') \
+        .pint.quantify() \
+        .droplevel(0)
+
+
+# get dataframe of process locations for each impcase; impcase i relocates the first i location groups
+def process_locations(locs: list) -> pd.DataFrame:
+    return pd.DataFrame(data=[
+            {
+                'impcase': f"Case {i}" if i else 'Base Case',
+                **{
+                    p: loc
+                    for loc, pgList in {'RE-rich': locs[:i], 'RE-scarce': locs[i:]}.items()
+                    for pg in pgList for p in pg
+                }
+            }
+            for i in range(len(locs) + 1)
+        ]) \
+        .set_index('impcase') \
+        .rename_axis('process', axis=1)
+
+
+# map epdcases and associated elec prices to processes
+def elec_cases(epdcases: pd.DataFrame, proc_locs: pd.DataFrame) -> pd.DataFrame:
+    proc_locs_stacked = proc_locs \
+        .stack() \
+        .swaplevel(0, 1, 0) \
+        .to_frame('location') \
+        .reset_index() \
+        .set_index(['process', 'location'])
+
+    # electricity-price difference cases by process
+    epdcases_by_proc = pd.concat(
+        [epdcases.query("process!='OTHER'")] +
+        [epdcases.query("process=='OTHER'").assign(process=p) for p in proc_locs.columns if p != 'ELH2']
+    )
+
+    return epdcases_by_proc \
+        .set_index(['process', 'epdcase']) \
+        .rename_axis('location', axis=1) \
+        .stack() \
+        .to_frame('price:elec') \
+        .merge(proc_locs_stacked, left_index=True, right_index=True) \
+        .reset_index() \
+        .drop(columns='location') \
+        .set_index(['impcase', 'epdcase', 'process']) \
+        .rename_axis('type', axis=1) \
+        .unstack('process')
+
+
+# financing assumptions by location of processes
+def wacc_assump(proc_locs: pd.DataFrame, irate: dict) -> pd.DataFrame:
+    return proc_locs \
+        .replace('RE-scarce', irate['RE-scarce']) \
+        .replace('RE-rich', irate['RE-rich']) \
+        .astype(float) \
+        .apply(lambda x: x/100.0) \
+        .assign(type='wacc') \
+        .set_index('type', append=True) \
+        .unstack('type')
+
+
+# transport cost assumptions for all impcases (including impsubcases) of a value chain
+def transp_assump(vc: dict, proc_locs: pd.DataFrame, table, transp_cost: pd.DataFrame) -> pd.DataFrame:
+    # find goods in value chain that have transport cost
+    traded = [
+        t.split(':')[-1] for t in transp_cost.columns
+        if table.data.columns.unique(level=1).str.match(fr"^demand(_sc)?:{t.split(':')[-1]}$").any()
+    ]
+
+    # create dataframe containing transport cost assumptions
+    assump_transp = pd.DataFrame(
+            index=proc_locs.index,
+            columns=traded,
+            data=np.nan,
+        ) \
+        .rename_axis('impcase') \
+        .rename_axis('traded', axis=1)
+
+    # match traded goods to import cases
+    for p1, p1s in vc['graph'].items():
+        for t, p2 in p1s.items():
+            if t in traded:
+                assump_transp.loc[(proc_locs[p1] != proc_locs[p2]), t] = 1
+    assump_transp.loc[proc_locs.index[-1], table.refFlow] = 1
+
+    # feedstocks imported to processes located in the RE-scarce region (e.g. iron ore for direct reduction)
+    for t, p in vc.get('imports', {}).items():
+        assump_transp.loc[proc_locs[p] == 'RE-scarce', t] = 1
+
+    # determine trade cost cases (including impsubcases)
+    trade_cost_cases = []
+    for impcase, row in assump_transp.iterrows():
+        trade_cost_case = pd.DataFrame(columns=['impcase'], data=[impcase])
+        for t in row.dropna().index.tolist():
+            tmp = transp_cost \
+                .loc[:, t] \
+                .dropna() \
+                .to_frame() \
+                .rename_axis(f"impsubcase_{t}") \
+                .reset_index()
+            trade_cost_case = trade_cost_case.merge(tmp, how='cross').dropna(axis=1, how='all')
+        trade_cost_cases.append(trade_cost_case)
+    assump_transp = pd.concat(trade_cost_cases)
+    index_cols = [c for c in assump_transp if c not in traded]
+    assump_transp = assump_transp \
+        .fillna({c: '' for c in index_cols}) \
+        .set_index(index_cols) \
+        .rename(columns={c: f"transp:{c}" for c in traded}) \
+        .rename_axis('type', axis=1)
+    assump_transp.index = assump_transp.index \
+        .map(lambda i: (i[0], f"{i[0]}{i[1]}")) \
+        .rename(['impcase', 'impsubcase'])
+
+    return assump_transp
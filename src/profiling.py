@@ -0,0 +1,131 @@
+import cProfile
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from src.utils import BASE_PATH
+
+
+# directory that profiles are written to
+PROFILE_DIR = Path(os.environ.get('GVC_PROFILE_DIR', BASE_PATH / 'profiles'))
+
+# interval between stack samples taken for the collapsed-stack output
+SAMPLE_INTERVAL = float(os.environ.get('GVC_PROFILE_INTERVAL', 0.005))
+
+# token that requests must send in header X-Profile-Token to profile generate calls over HTTP; profiling over HTTP is
+# disabled if unset
+PROFILE_TOKEN = os.environ.get('GVC_PROFILE_TOKEN') or None
+
+# maximum number of generate calls armed for profiling at any time
+MAX_PROFILES = int(os.environ.get('GVC_PROFILE_MAX', 10))
+
+# number of upcoming generate calls to profile (initialised from environment, can be increased at runtime)
+_remaining = int(os.environ.get('GVC_PROFILE_NEXT', 0))
+_lock = threading.Lock()
+_active = threading.local()
+
+# sequence number of profiles written by this process, so that profiles of calls ending within the same second do not
+# overwrite each other
+_sequence = itertools.count(1)
+
+
+# profile the next n generate calls, up to MAX_PROFILES armed at a time
+def arm(n: int) -> int:
+    global _remaining
+    if n < 0:
+        raise ValueError('Number of calls to profile must not be negative.')
+    with _lock:
+        # never lowered below the number armed via GVC_PROFILE_NEXT
+        _remaining = max(min(_remaining + n, MAX_PROFILES), _remaining)
+        return _remaining
+
+
+# claim one of the armed profiles
+def _claim() -> bool:
+    global _remaining
+    with _lock:
+        if _remaining <= 0:
+            return False
+        _remaining -= 1
+        return True
+
+
+class Profile:
+    def __init__(self, name: str):
+        self._name = name
+        self._profiler = cProfile.Profile()
+        self._stacks = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def start(self):
+        self._sampler.start()
+        self._profiler.enable()
+
+    # stop profiling and write cProfile stats and collapsed stacks; returns the paths written
+    def stop(self) -> list[Path]:
+        self._profiler.disable()
+        self._stop.set()
+        self._sampler.join()
+
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_sequence):04d}-{self._name}"
+        path_stats = PROFILE_DIR / f"{stem}.prof"
+        path_collapsed = PROFILE_DIR / f"{stem}.collapsed"
+
+        self._profiler.dump_stats(path_stats)
+        with open(path_collapsed, 'w') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        return [path_stats, path_collapsed]
+
+    # periodically sample the stack of the profiled thread (root first, as expected by flamegraph tools)
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self._stacks[';'.join(reversed(stack))] += 1
+
+
+# profile the enclosed generate call if forced or if profiles were armed; yields the profile if active
+@contextmanager
+def profiled(name: str, force: bool = False):
+    if not (force or _claim()):
+        yield None
+        return
+
+    profile = Profile(name)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+
+
+# update function registered first: starts profiling a GENERATE callback if armed; stopped by end_request()
+def profile_generate(inputs_updated: dict, btn_pressed: str, args: list):
+    end_request()
+    if _claim():
+        _active.profile = Profile('callback')
+        _active.profile.start()
+
+
+# stop a profile started for the current request, if any
+def end_request(exc: Optional[BaseException] = None):
+    profile = getattr(_active, 'profile', None)
+    if profile is not None:
+        _active.profile = None
+        profile.stop()
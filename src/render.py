@@ -0,0 +1,46 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import plotly.io._kaleido as pio_kaleido
+
+
+# capture image writes issued while exporting figures instead of rendering them right away; yields the list of
+# captured (figure JSON, file path, args, kwargs) render jobs
+@contextmanager
+def deferred_image_writes():
+    jobs = []
+    originals = pio.write_image, pio_kaleido.write_image
+
+    def write_image(fig, file, *args, **kwargs):
+        if not isinstance(file, (str, Path)):
+            return originals[0](fig, file, *args, **kwargs)
+        jobs.append((pio.to_json(fig, validate=False), str(file), args, kwargs))
+
+    pio.write_image = pio_kaleido.write_image = write_image
+    try:
+        yield jobs
+    finally:
+        pio.write_image, pio_kaleido.write_image = originals
+
+
+# start kaleido once per worker, so that every render job after the first is served by a warm instance
+def _init_worker():
+    pio.to_image(go.Figure(), format='png')
+
+
+def _render(job: tuple) -> str:
+    fig_json, file, args, kwargs = job
+    pio.write_image(pio.from_json(fig_json, skip_invalid=True), file, *args, **kwargs)
+    return file
+
+
+# render captured jobs across a pool of worker processes; returns the paths written
+def render_jobs(jobs: list, n_jobs: int = 1) -> list:
+    if n_jobs <= 1 or len(jobs) <= 1:
+        return [_render(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(jobs)), initializer=_init_worker) as executor:
+        return list(executor.map(_render, jobs))
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import pandas as pd
+
+from src.lcox import assumption_key, evaluate
+from src.load import load_data, load_posted, load_other
+from src.proc import process_inputs
+from src.shared import freeze_inputs
+
+
+# mapping evicting its least-recently used entries beyond a maximum size
+class LRUCache(OrderedDict):
+    def __init__(self, maxsize: int):
+        super(LRUCache, self).__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super(LRUCache, self).__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super(LRUCache, self).__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+# in-process session owning loaded inputs and processed default outputs, e.g. for notebooks:
+#   session = Session()
+#   session.evaluate({'wacc': {'RE-rich': 10.0}})
+class Session:
+    def __init__(self, maxsize: int = 64, inputs: Optional[dict] = None):
+        if inputs is None:
+            inputs = {}
+            load_data(inputs)
+            load_posted(inputs)
+            load_other(inputs)
+            freeze_inputs(inputs)
+        self.inputs = inputs
+
+        self.outputs = {}
+        process_inputs(self.inputs, self.outputs)
+
+        # memoised results and intermediate assumption frames (e.g. transport subcases) reused between calls
+        self._results = LRUCache(maxsize)
+        self._frames = LRUCache(16 * maxsize)
+        self._lock = threading.Lock()
+
+    # levelised cost of production for given overrides (electricity prices, transport cost, WACC; see
+    # src.lcox.parse_assumption_set), memoised by a hash of the overrides
+    def evaluate(self, overrides: Optional[dict] = None, detailed: bool = False) -> pd.DataFrame:
+        key = assumption_key([overrides or {}, detailed])
+        with self._lock:
+            if key in self._results:
+                return self._results[key].copy()
+
+            result = evaluate(self.inputs, self.outputs, [overrides or {}], detailed=detailed, frames=self._frames) \
+                .drop(columns='set')
+            self._results[key] = result
+
+        return result.copy()
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._frames.clear()
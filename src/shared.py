@@ -0,0 +1,90 @@
+from collections import ChainMap
+
+import numpy as np
+import pandas as pd
+
+
+# read-only mapping shared between concurrent requests; (deep) copies return the mapping itself, so that the loaded
+# data tables are never duplicated per request
+class Frozen(dict):
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('Shared inputs are read-only. Assign a new object to the per-request inputs instead.')
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo: dict):
+        return self
+
+    def __reduce__(self):
+        return Frozen, (dict(self),)
+
+
+# read-only list, the counterpart of Frozen for lists nested in shared data
+class FrozenList(list):
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('Shared inputs are read-only. Assign a new object to the per-request inputs instead.')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = clear = extend = insert = pop = remove = reverse = sort = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo: dict):
+        return self
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+
+# read-only version of parsed data (nested dicts and lists), which can be shared by all callers instead of being copied
+def freeze(obj):
+    if isinstance(obj, dict):
+        return Frozen({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return FrozenList(freeze(v) for v in obj)
+    return obj
+
+
+# mutable copy of frozen data, for code outside this repository that may modify it
+def thaw(obj):
+    if isinstance(obj, dict):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+def _freeze_obj(obj):
+    if isinstance(obj, dict):
+        return Frozen({k: _freeze_obj(v) for k, v in obj.items()})
+    if isinstance(obj, pd.DataFrame):
+        _freeze_frame(obj)
+    elif hasattr(obj, 'data') and isinstance(obj.data, pd.DataFrame):
+        _freeze_frame(obj.data)
+    return obj
+
+
+# mark the arrays backing a dataframe as read-only, so that accidental in-place changes raise instead of leaking into
+# other requests (pint arrays keep their magnitudes in attribute _data)
+def _freeze_frame(df: pd.DataFrame):
+    for arr in df._mgr.arrays:
+        arr = getattr(arr, '_data', arr)
+        if isinstance(arr, np.ndarray):
+            arr.flags.writeable = False
+
+
+# load function registered after all other load functions: turns the large loaded inputs into an immutable base layer
+def freeze_inputs(inputs: dict):
+    for key in ('value_chains', 'other_assump', 'proc_tables', 'vc_tables'):
+        if key in inputs:
+            inputs[key] = _freeze_obj(inputs[key])
+
+
+# thin per-request overlay on top of the shared inputs: updated inputs are assigned to the overlay only
+def overlay(inputs: dict) -> ChainMap:
+    return ChainMap({}, inputs)
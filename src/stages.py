@@ -0,0 +1,58 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+# job currently executed in this context (set by the worker pool or when tracking a GENERATE callback); kept apart from
+# the job queue in src.jobs, so that the pipeline can report stages without importing the web stack
+_current_job: ContextVar[Optional['Job']] = ContextVar('current_job', default=None)
+
+
+def current_job() -> Optional['Job']:
+    return _current_job.get()
+
+
+# report progress for a pipeline stage and abort if the current job was superseded; usable as decorator
+@contextmanager
+def stage(name: str):
+    job = _current_job.get()
+    if job is None:
+        yield
+        return
+
+    job.enter_stage(name)
+    try:
+        yield
+    finally:
+        job.leave_stage(name)
+
+
+# stages of plots run by a forked worker process, recorded with their start and end times for the parent process to add
+# them to its job; stands in for the job in the worker, which hence never touches the job (or its locks) inherited from
+# the parent
+class StageRecorder:
+    cancelled = False
+
+    def __init__(self):
+        self.stages = []
+
+    def enter_stage(self, name: str):
+        self.stages.append([name, time.time(), None])
+
+    def leave_stage(self, name: str):
+        for s in reversed(self.stages):
+            if s[0] == name and s[2] is None:
+                s[2] = time.time()
+                break
+
+
+# record the stages run in the enclosed block instead of reporting them to the current job
+@contextmanager
+def recorded_stages():
+    recorder = StageRecorder()
+    token = _current_job.set(recorder)
+    try:
+        yield recorder.stages
+    finally:
+        _current_job.reset(token)
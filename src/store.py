@@ -0,0 +1,97 @@
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.precision import PRECISION
+
+
+# dimension columns of the long-format result tables
+DIMENSIONS = ['commodity', 'epdcase', 'impsubcase', 'process', 'type']
+
+# file suffixes of supported columnar formats
+SUFFIXES = {'parquet': '.parquet', 'arrow': '.arrows'}
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError('Columnar output requires package pyarrow (e.g. install via `poetry install -E arrow`).')
+    return pa, pq
+
+
+# convert LCOX data of a commodity to the long format with categorical dimension columns
+def long_format(comm: str, lcox_data: pd.DataFrame) -> pd.DataFrame:
+    return lcox_data \
+        .pint.dequantify().droplevel('unit', axis=1) \
+        .stack(['process', 'type']).to_frame('value') \
+        .reset_index() \
+        .assign(commodity=comm) \
+        .filter(DIMENSIONS + ['value']) \
+        .astype({d: 'category' for d in DIMENSIONS} | {'value': PRECISION})
+
+
+# convert long-format results of a commodity to the wide layout of the Excel spreadsheet
+def wide_format(comm_data: pd.DataFrame) -> pd.DataFrame:
+    return comm_data \
+        .astype({d: 'object' for d in DIMENSIONS}) \
+        .set_index(['epdcase', 'impsubcase', 'type', 'process'])[['value']] \
+        .unstack(['type', 'process']) \
+        .droplevel(level=0, axis=1) \
+        .sort_index(axis=0) \
+        .sort_index(axis=1)
+
+
+# writes long-format results in a columnar format, one commodity at a time, so that results never need to be held in
+# memory all at once
+class ResultWriter:
+    def __init__(self, path: Path, fmt: str):
+        self._pa, self._pq = _pyarrow()
+        self._path = path
+        self._fmt = fmt
+        self._schema = self._pa.schema(
+            [(d, self._pa.dictionary(self._pa.int32(), self._pa.string())) for d in DIMENSIONS] +
+            [('value', self._pa.from_numpy_dtype(np.dtype(PRECISION)))]
+        )
+        if fmt == 'parquet':
+            self._writer = self._pq.ParquetWriter(path, self._schema)
+        elif fmt == 'arrow':
+            # stream format, as it (unlike the file format) allows each batch to carry its own dictionaries
+            self._writer = self._pa.ipc.new_stream(path, self._schema)
+        else:
+            raise ValueError(f"Unknown columnar format: {fmt}")
+
+    def write(self, comm_data: pd.DataFrame):
+        self._writer.write_table(self._pa.Table.from_pandas(comm_data, schema=self._schema, preserve_index=False))
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# read results of one or all commodities from a columnar store
+def read_results(path: Path, commodity: Optional[str] = None) -> pd.DataFrame:
+    pa, pq = _pyarrow()
+    if path.suffix == SUFFIXES['parquet']:
+        table = pq.read_table(path, filters=[('commodity', '=', commodity)] if commodity is not None else None)
+    else:
+        with pa.ipc.open_stream(path) as reader:
+            batches = [b for b in reader if commodity is None or commodity in b.column('commodity').to_pylist()]
+        table = pa.Table.from_batches(batches, schema=reader.schema).unify_dictionaries()
+    ret = table.to_pandas()
+    return ret if commodity is None else ret.query(f"commodity=='{commodity}'")
+
+
+# render results of given commodities from a columnar store as Excel spreadsheet with one sheet per commodity
+def render_excel(store_path: Path, file_path: Path, commodities: Iterable[str]):
+    with pd.ExcelWriter(file_path) as writer:
+        for comm in commodities:
+            wide_format(read_results(store_path, comm)).to_excel(writer, sheet_name=comm, index=True)
@@ -0,0 +1,194 @@
+import hashlib
+import itertools
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.lcox import evaluate
+from src.manifest import inputs_hash
+from src.utils import CACHE_PATH
+
+
+SURROGATE_PATH = CACHE_PATH / 'surrogate.npz'
+
+# parameters of the lattice: electricity-price difference (EUR/MWh), transport cost of H2 (EUR/MWh, all subcases), and
+# WACC in the RE-rich region (%)
+AXES = {
+    'epd': np.linspace(0.0, 100.0, 11),
+    'h2transp': np.linspace(5.0, 90.0, 7),
+    'wacc': np.linspace(5.0, 20.0, 7),
+}
+
+# number of sets evaluated per batch when building the lattice, and number of random points to validate it against
+BATCH_SIZE = 50
+N_VALIDATE = 40
+
+
+# key of a lattice built from the default inputs: everything these depend on (see src.manifest), and the code building
+# the lattice
+def surrogate_key() -> str:
+    h = hashlib.sha256(inputs_hash().encode())
+    h.update(Path(__file__).read_bytes())
+    return h.hexdigest()
+
+
+# assumption set for a point of the lattice, taking electricity prices of the given case for the RE-scarce region
+def assumption_set(inputs: dict, point: dict, epdcase: str = 'medium') -> dict:
+    prices = inputs['epdcases'] \
+        .pint.dequantify().droplevel('unit', axis=1)
+    prices = prices.assign(**{'RE-rich': lambda df: df['RE-scarce'] - point['epd']})
+
+    return {
+        'elec_prices': prices.to_dict('records'),
+        'transp_cost': inputs['transp_cost']
+            .assign(assump=lambda df: df['assump'].where(df['traded'] != 'h2', point['h2transp']))
+            .to_dict('records'),
+        'wacc': {'RE-rich': point['wacc']},
+    }
+
+
+# exact production cost relative to the Base Case (in %) by commodity and impsubcase for a list of points
+def evaluate_relative(inputs: dict, outputs: dict, points: list, epdcase: str = 'medium') -> pd.DataFrame:
+    result = evaluate(inputs, outputs, [assumption_set(inputs, p, epdcase) for p in points]) \
+        .query(f"epdcase=='{epdcase}'")
+    base = result \
+        .query("impcase=='Base Case'") \
+        .set_index(['set', 'commodity'])['value']
+
+    return result \
+        .query("impcase!='Base Case'") \
+        .assign(value=lambda df: 100.0 * df['value'].values / base.loc[list(zip(df['set'], df['commodity']))].values) \
+        .set_index(['set', 'commodity', 'impsubcase'])['value'] \
+        .unstack(['commodity', 'impsubcase']) \
+        .dropna(axis=1, how='all')
+
+
+# multilinear interpolation on a regular lattice; `values` holds one trailing dimension of series
+def interpolate(axes: list, values: np.ndarray, point: list) -> np.ndarray:
+    idx, weights = [], []
+    for ax, x in zip(axes, point):
+        x = float(np.clip(x, ax[0], ax[-1]))
+        i = int(np.clip(np.searchsorted(ax, x, side='right') - 1, 0, len(ax) - 2))
+        idx.append(i)
+        weights.append((x - ax[i]) / (ax[i + 1] - ax[i]))
+
+    ret = np.zeros(values.shape[-1])
+    for corner in itertools.product((0, 1), repeat=len(axes)):
+        w = np.prod([t if c else 1.0 - t for c, t in zip(corner, weights)])
+        if w:
+            ret += w * values[tuple(i + c for i, c in zip(idx, corner))]
+
+    return ret
+
+
+# lattice of relative production cost over the slider parameters, queried by interpolation without processing inputs
+class Surrogate:
+    def __init__(self, axes: dict, values: np.ndarray, series: pd.MultiIndex, error: np.ndarray, key: str = ''):
+        self.axes = axes
+        self.values = values
+        self.series = series
+        self.error = error
+        self.key = key
+
+    # evaluate all points of the lattice in batches, then validate interpolation against exact evaluation at random
+    # points inside the lattice and record the maximum absolute error (in percentage points) of each series at these
+    # points as an estimate of its interpolation error
+    @classmethod
+    def build(cls, inputs: dict, outputs: dict, axes: Optional[dict] = None, n_validate: int = N_VALIDATE,
+              seed: int = 0):
+        axes = axes or AXES
+        names = list(axes)
+        grid = [dict(zip(names, p)) for p in itertools.product(*axes.values())]
+
+        values = pd.concat([
+            evaluate_relative(inputs, outputs, grid[i:i + BATCH_SIZE])
+            for i in range(0, len(grid), BATCH_SIZE)
+        ], ignore_index=True)
+        series = values.columns
+        values = values.values.reshape(*[len(ax) for ax in axes.values()], len(series))
+
+        rng = np.random.default_rng(seed)
+        samples = [
+            {n: rng.uniform(ax[0], ax[-1]) for n, ax in axes.items()}
+            for _ in range(n_validate)
+        ]
+        error = np.zeros(len(series))
+        if samples:
+            exact = evaluate_relative(inputs, outputs, samples)[series].values
+            approx = np.array([interpolate(list(axes.values()), values, list(s.values())) for s in samples])
+            error = np.abs(exact - approx).max(axis=0)
+
+        return cls(axes, values, series, error, surrogate_key())
+
+    # written to a temporary file unique to this call and then moved into place, so that processes saving concurrently
+    # never interleave their writes and readers never see a partial file
+    def save(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix='.npz')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    names=np.array(list(self.axes)),
+                    **{f"axis_{n}": ax for n, ax in self.axes.items()},
+                    values=self.values,
+                    series=np.array([list(s) for s in self.series]),
+                    error=self.error,
+                    key=np.array(self.key),
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            axes = {str(n): f[f"axis_{n}"] for n in f['names']}
+            series = pd.MultiIndex.from_tuples([tuple(s) for s in f['series']], names=['commodity', 'impsubcase'])
+            return cls(axes, f['values'], series, f['error'], str(f['key']))
+
+    # interpolated relative production cost (in %) and the estimated interpolation error (in percentage points) by
+    # commodity and impsubcase; values outside the lattice are clipped to its bounds
+    def query(self, **point) -> pd.DataFrame:
+        missing = set(self.axes) - set(point)
+        if missing:
+            raise ValueError(f"Missing parameters: {', '.join(sorted(missing))}")
+
+        return pd.DataFrame(
+            data={
+                'LCOP_rel': interpolate(list(self.axes.values()), self.values, [point[n] for n in self.axes]),
+                'error': self.error,
+            },
+            index=self.series,
+        ).reset_index()
+
+
+_surrogate: Optional[Surrogate] = None
+_lock = threading.Lock()
+
+
+# surrogate for the default inputs of the webapp, loaded from disk if built from unchanged inputs and code and built
+# (and saved) otherwise; only done on first use, so that entry points not using the sliders never pay for it
+def default_surrogate() -> Surrogate:
+    global _surrogate
+    from src.pipeline import default_inputs, default_outputs
+
+    with _lock:
+        if _surrogate is None:
+            if SURROGATE_PATH.exists():
+                surrogate = Surrogate.load(SURROGATE_PATH)
+                if surrogate.key == surrogate_key() and \
+                        list(surrogate.axes) == list(AXES) and \
+                        all(np.array_equal(surrogate.axes[n], AXES[n]) for n in AXES):
+                    _surrogate = surrogate
+            if _surrogate is None:
+                _surrogate = Surrogate.build(default_inputs(), default_outputs())
+                _surrogate.save(SURROGATE_PATH)
+
+    return _surrogate
@@ -0,0 +1,160 @@
+from string import ascii_uppercase
+
+import numpy as np
+import pandas as pd
+from posted.config.config import flowTypes
+from posted.ted.TEDataTable import TEDataTable
+from posted.units.units import ureg
+
+from src.load import load_other, load_vc_tables
+
+
+# size parameters of synthetic problems and their defaults (resembling the size of the shipped value chains)
+DEFAULTS = {
+    'n_chains': 3,
+    'n_processes': 5,
+    'depth': 3,
+    'n_locations': 3,
+    'n_traded': 2,
+    'n_subcases': 2,
+    'n_epdcases': 3,
+    'n_feedstocks': 4,
+}
+
+
+# register synthetic flows with POSTED, copying the specs of an existing flow measured in tonnes, so that unit
+# handling of the process graph tables treats them like real commodities
+def _register_flow(flow_id: str, template: str = 'nh3'):
+    if flow_id not in flowTypes:
+        flowTypes[flow_id] = flowTypes[template] | {'name': flow_id}
+
+
+# process datatable in the format generated from the POSTED database: a single row of columns (part, type)
+def _table(tid: str, ref_flow: str, ref_unit: str, values: dict) -> TEDataTable:
+    data = pd.DataFrame({
+        ('value', t): pd.Series([v], dtype=f"pint[{u}]")
+        for t, (v, u) in values.items()
+    })
+    data.columns.names = ['part', 'type']
+    return TEDataTable(data=data, refQuantity=ureg(f"1 {ref_unit}"), refFlow=ref_flow, name=tid)
+
+
+# generate the process graph of one value chain: a tree of given depth with the final process at its root, electrolysis
+# supplying hydrogen to a process of the deepest level, and processes split into location groups from upstream to
+# downstream; a tree of depth 1 only holds the final process, which is then supplied by electrolysis directly
+def _chain(comm: str, rng: np.random.Generator, n_processes: int, depth: int, n_locations: int) -> dict:
+    depth = max(1, min(depth, n_processes - 1))
+    levels = [[f"{comm}-P{i:03d}"] if not i else [] for i in range(depth)]
+    for i in range(1, n_processes - 1 if depth > 1 else 1):
+        level = i if i < depth else int(rng.integers(1, depth))
+        levels[level].append(f"{comm}-P{i:03d}")
+
+    graph = {levels[0][0]: {}}
+    for level in range(1, depth):
+        for p in levels[level]:
+            parent = levels[level - 1][int(rng.integers(len(levels[level - 1])))]
+            graph[parent][p.lower()] = p
+            graph[p] = {}
+    graph[levels[-1][int(rng.integers(len(levels[-1])))]]['h2'] = 'ELH2'
+    graph['ELH2'] = {}
+
+    upstream = ['ELH2'] + [p for level in reversed(levels) for p in level]
+    n_locations = max(1, min(n_locations, len(upstream)))
+
+    return {
+        'graph': graph,
+        'locations': [g.tolist() for g in np.array_split(np.array(upstream, dtype=object), n_locations)],
+    }
+
+
+# generate inputs for a synthetic problem of given size, in the same format as loaded from the data directory and
+# POSTED (value chains, electricity-price cases, other prices, transport cost, other assumptions, and datatables)
+def synthetic_inputs(seed: int = 0, **size) -> dict:
+    size = DEFAULTS | size
+    rng = np.random.default_rng(seed)
+    inputs = {}
+
+    # value chains
+    vcs = {
+        f"Chain{c:02d}": _chain(f"C{c:02d}", rng, size['n_processes'], size['depth'], size['n_locations'])
+        for c in range(size['n_chains'])
+    }
+    inputs['value_chains'] = vcs
+
+    # electricity-price cases with growing price differences
+    epd = np.linspace(20.0, 70.0, size['n_epdcases'])
+    inputs['epdcases'] = pd.DataFrame([
+            {'epdcase': f"case{k}", 'process': process, 'RE-rich': rich, 'RE-scarce': rich + epd[k]}
+            for k in range(size['n_epdcases'])
+            for process, rich in (('ELH2', 30.0), ('OTHER', 50.0))
+        ]) \
+        .astype({c: 'pint[EUR/MWh]' for c in ('RE-scarce', 'RE-rich')})
+
+    # feedstock prices
+    feedstocks = [f"feed{j}" for j in range(size['n_feedstocks'])]
+    for f in feedstocks:
+        _register_flow(f)
+    inputs['other_prices'] = pd.DataFrame([
+            {'type': f"price:{f}", 'assump': rng.uniform(10.0, 500.0), 'unit': 'EUR/t'}
+            for f in feedstocks
+        ]) \
+        .astype({'assump': 'float32'}) \
+        .set_index(['type', 'unit']) \
+        .transpose() \
+        .pint.quantify() \
+        .reset_index(drop=True)
+
+    # transport cost of final products, hydrogen, and randomly chosen intermediates with subcases
+    intermediates = [f for vc in vcs.values() for p in vc['graph'].values() for f in p if f != 'h2']
+    traded = ['h2'] + [list(vc['graph'])[0].lower() for vc in vcs.values()] + \
+        [str(f) for f in rng.choice(intermediates, size=min(size['n_traded'], len(intermediates)), replace=False)]
+    subcases = list(ascii_uppercase[:size['n_subcases']]) if size['n_subcases'] > 1 else [np.nan]
+    inputs['transp_cost'] = pd.DataFrame([
+            {
+                'traded': t,
+                'impsubcase': sc,
+                'assump': rng.uniform(5.0, 80.0),
+                'unit': 'EUR/MWh' if t == 'h2' else 'EUR/t',
+            }
+            for t in dict.fromkeys(traded)
+            for sc in subcases
+        ]) \
+        .astype({'assump': 'float32'})
+
+    inputs['other_assump'] = {
+        'period': 2040,
+        'ocf': {'default': 0.95, 'ELH2': 0.5},
+        'irate': {'RE-scarce': 5.0, 'RE-rich': 8.0},
+        'ltime': 18,
+    }
+
+    # process datatables
+    inputs['proc_tables'] = {
+        'ELH2': _table('ELH2', 'h2', 'MWh', {
+            'capex': (rng.uniform(40.0, 80.0), 'EUR/(MWh/a)'),
+            'fopex': (rng.uniform(1.0, 3.0), 'EUR/(MWh/a)/a'),
+            'demand:elec': (rng.uniform(1.3, 1.6), 'MWh/MWh'),
+        }),
+    }
+    for vc in vcs.values():
+        for tid, suppliers in vc['graph'].items():
+            if tid == 'ELH2':
+                continue
+            _register_flow(tid.lower())
+            values = {
+                'capex': (rng.uniform(50.0, 1000.0), 'EUR/(t/a)'),
+                'fopex': (rng.uniform(2.0, 40.0), 'EUR/(t/a)/a'),
+                'demand:elec': (rng.uniform(0.1, 3.0), 'MWh/t'),
+            }
+            for flow in suppliers:
+                values[f"demand:{flow}"] = (rng.uniform(1.0, 40.0), 'MWh/t') if flow == 'h2' else \
+                    (rng.uniform(0.5, 2.0), 't/t')
+            for f in rng.choice(feedstocks, size=min(2, len(feedstocks)), replace=False):
+                values[f"demand:{f}"] = (rng.uniform(0.1, 2.0), 't/t')
+            inputs['proc_tables'][tid] = _table(tid, tid.lower(), 't', values)
+
+    # process graph datatables with other assumptions added, as after loading the real data
+    load_vc_tables(inputs)
+    load_other(inputs)
+
+    return inputs
@@ -1,10 +1,28 @@
+import hashlib
+import os
 import pathlib
+import pickle
+import tempfile
+import threading
 
 import pandas as pd
 import yaml
 
+from src.shared import freeze, thaw
+
+# use libyaml C loader if available
+try:
+    from yaml import CFullLoader as FullLoader
+except ImportError:
+    from yaml import FullLoader
+
 
 BASE_PATH = pathlib.Path(__file__).parent.parent.resolve()
+CACHE_PATH = pathlib.Path(os.environ.get('GVC_CACHE_DIR', BASE_PATH / '.cache'))
+
+# parsed YAML files by path, along with the modification time and size they were parsed at
+_yaml_cache = {}
+_yaml_lock = threading.Lock()
 
 
 def load_csv_data_file(fname: str):
@@ -12,22 +30,78 @@ def load_csv_data_file(fname: str):
     return pd.read_csv(path)
 
 
-def load_yaml_data_file(fname: str):
-    path = BASE_PATH / 'data' / f"{fname}.yml"
-    with open(path, 'r') as f:
-        ret = yaml.load(f.read(), Loader=yaml.FullLoader)
+# parse YAML file; results are cached in memory (until the file's modification time or size change) and on disk in
+# pickled form (keyed by the hash of the file content), so that unchanged files are never parsed twice; callers share
+# the returned objects, which are hence read-only (see src.shared.freeze)
+def load_yaml_file(path: pathlib.Path):
+    stat = path.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _yaml_lock:
+        cached = _yaml_cache.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    content = path.read_bytes()
+    digest = hashlib.sha256(yaml.__version__.encode() + b'\0' + content).hexdigest()
+    cache_file = CACHE_PATH / 'yaml' / f"{digest}.pickle"
+    # any file that cannot be unpickled (missing, truncated, or written by other versions) is parsed and written anew
+    try:
+        ret = pickle.loads(cache_file.read_bytes())
+    except Exception:
+        ret = yaml.load(content, Loader=FullLoader)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=cache_file.parent, suffix='.tmp', delete=False) as f:
+                f.write(pickle.dumps(ret, protocol=pickle.HIGHEST_PROTOCOL))
+            try:
+                os.replace(f.name, cache_file)
+            except OSError:
+                os.unlink(f.name)
+                raise
+        except OSError:
+            pass
+
+    ret = freeze(ret)
+    with _yaml_lock:
+        _yaml_cache[path] = (version, ret)
+
     return ret
 
 
+def load_yaml_data_file(fname: str):
+    return load_yaml_file(BASE_PATH / 'data' / f"{fname}.yml")
+
+
 def load_yaml_config_file(fname: str):
-    path = BASE_PATH / 'config' / f"{fname}.yml"
-    with open(path, 'r') as f:
-        ret = yaml.load(f.read(), Loader=yaml.FullLoader)
-    return ret
+    return load_yaml_file(BASE_PATH / 'config' / f"{fname}.yml")
 
 
+# plot configs are handed to piw, so they are returned as mutable copies
 def load_yaml_plot_config_file(base_name: str):
-    path = BASE_PATH / 'config' / 'plots' / f"{base_name}.yml"
-    with open(path, 'r') as f:
-        ret = yaml.load(f.read(), Loader=yaml.FullLoader)
-    return ret['figures'], ret['config']
+    ret = load_yaml_file(BASE_PATH / 'config' / 'plots' / f"{base_name}.yml")
+    return thaw(ret['figures']), thaw(ret['config'])
+
+
+# class attribute holding part of a plot config file, which is only loaded on first access
+class _LazyPlotConfig:
+    def __init__(self, base_name: str, key: str):
+        self._base_name = base_name
+        self._key = key
+
+    def __set_name__(self, owner, name: str):
+        self._name = name
+
+    def __get__(self, obj, objtype=None):
+        figs, cfg = load_yaml_plot_config_file(self._base_name)
+        value = figs if self._key == 'figures' else cfg
+
+        # replace descriptor by loaded value, so that later accesses are plain attribute lookups
+        owner = next(c for c in (objtype or type(obj)).__mro__ if c.__dict__.get(self._name) is self)
+        setattr(owner, self._name, value)
+        return value
+
+
+# lazily loaded figures and config of a plot class, e.g. `figs, cfg = lazy_plot_config('TotalCostPlot')`
+def lazy_plot_config(base_name: str):
+    return _LazyPlotConfig(base_name, 'figures'), _LazyPlotConfig(base_name, 'config')
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+import argparse
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.lcox import evaluate
+from src.session import Session
+
+
+SWEEPDIR = Path(__file__).parent / 'sweep'
+
+# session shared with worker processes (forked after loading)
+_session = None
+
+
+# sweep parameters and their descriptions
+PARAMS = {
+    'epd': 'electricity-price difference between RE-scarce and RE-rich locations (EUR/MWh)',
+    'wacc': 'WACC in RE-rich locations (%%)',
+    'ocf': 'operating capacity factor of electrolysis',
+    'transp': 'transport cost of the traded good selected via --transp-good (all subcases)',
+}
+
+
+# parse a parameter range given as a single value or as `start:stop:num` (inclusive, linearly spaced)
+def parse_range(spec: str) -> list:
+    parts = spec.split(':')
+    if len(parts) == 1:
+        return [float(parts[0])]
+    start, stop, num = parts
+    return np.linspace(float(start), float(stop), int(num)).tolist()
+
+
+# assumption set for one point of the grid
+def assumption_set(point: dict, spec: dict) -> dict:
+    inputs = _session.inputs
+    ret = {}
+
+    if 'epd' in point:
+        ret['elec_prices'] = inputs['epdcases'] \
+            .pint.dequantify().droplevel('unit', axis=1) \
+            .assign(**{'RE-rich': lambda df: df['RE-scarce'] - point['epd']}) \
+            .to_dict('records')
+    if 'wacc' in point:
+        ret['wacc'] = {'RE-rich': point['wacc']}
+    if 'ocf' in point:
+        ret['ocf'] = {'ELH2': point['ocf']}
+    if 'transp' in point:
+        ret['transp_cost'] = inputs['transp_cost'] \
+            .assign(assump=lambda df: df['assump'].where(df['traded'] != spec['transp_good'], point['transp'])) \
+            .to_dict('records')
+
+    return ret
+
+
+# evaluate one chunk of the grid and write it as a partition of the dataset; partitions are written to a temporary
+# file first, so that interrupted runs never leave incomplete partitions behind
+def run_chunk(chunk: int, spec: dict, path: Path) -> int:
+    names = list(spec['ranges'])
+    shape = [len(spec['ranges'][n]) for n in names]
+    idx = range(chunk * spec['chunk_size'], min((chunk + 1) * spec['chunk_size'], int(np.prod(shape))))
+    points = pd.DataFrame(
+        data=np.array([
+            [spec['ranges'][n][i] for n, i in zip(names, np.unravel_index(j, shape))]
+            for j in idx
+        ]).reshape(-1, len(names)),
+        columns=names,
+        index=pd.Index(idx, name='point'),
+    )
+
+    result = evaluate(_session.inputs, _session.outputs, [
+            assumption_set(point.to_dict(), spec)
+            for _, point in points.iterrows()
+        ]) \
+        .query(f"epdcase=='{spec['epdcase']}'") \
+        .drop(columns=['epdcase']) \
+        .assign(point=lambda df: points.index[df['set']]) \
+        .drop(columns=['set']) \
+        .merge(points.reset_index(), on='point')
+
+    tmp = path.with_suffix('.tmp')
+    result.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+    return chunk
+
+
+def sweep():
+    global _session
+
+    parser = argparse.ArgumentParser(description='Run a resumable full-factorial parameter sweep of LCOX.')
+    parser.add_argument('name', help='name of the sweep (output directory in sweep/)')
+    for param, desc in PARAMS.items():
+        parser.add_argument(f"--{param}", help=f"{desc}; value or range start:stop:num")
+    parser.add_argument('--transp-good', default='h2', help='traded good whose transport cost is swept (default: h2)')
+    parser.add_argument('--epdcase', default='medium', help='electricity-price case to take prices from')
+    parser.add_argument('--chunk-size', type=int, default=200, help='grid points per partition (default: 200)')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(), help='number of worker processes')
+    args = parser.parse_args()
+
+    spec = {
+        'ranges': {p: parse_range(getattr(args, p)) for p in PARAMS if getattr(args, p) is not None},
+        'transp_good': args.transp_good,
+        'epdcase': args.epdcase,
+        'chunk_size': args.chunk_size,
+    }
+    if not spec['ranges']:
+        parser.error('At least one parameter range is required.')
+
+    # refuse to resume a sweep with a different specification
+    path = SWEEPDIR / args.name
+    path.mkdir(parents=True, exist_ok=True)
+    spec_path = path / 'spec.json'
+    if spec_path.exists() and json.loads(spec_path.read_text()) != spec:
+        raise SystemExit(f"Sweep {args.name} exists with a different specification. Choose another name.")
+    spec_path.write_text(json.dumps(spec, indent=2))
+
+    # determine partitions not yet completed
+    n_points = int(np.prod([len(r) for r in spec['ranges'].values()]))
+    n_chunks = -(-n_points // spec['chunk_size'])
+    todo = [c for c in range(n_chunks) if not (path / f"part-{c:06d}.parquet").exists()]
+    print(f"{n_points} points in {n_chunks} partitions, {n_chunks - len(todo)} already completed.")
+    if not todo:
+        return
+
+    # load once in this process and fork workers sharing the loaded data
+    _session = Session()
+    with ProcessPoolExecutor(max_workers=args.jobs, mp_context=multiprocessing.get_context('fork')) as executor:
+        futures = [executor.submit(run_chunk, c, spec, path / f"part-{c:06d}.parquet") for c in todo]
+        for i, future in enumerate(as_completed(futures)):
+            future.result()
+            print(f"Completed {i + 1}/{len(todo)} partitions.", end='\r')
+    print()
+
+
+# call sweep function when running as script
+if __name__ == '__main__':
+    sweep()
@@ -0,0 +1,23 @@
+import pytest
+
+
+# inputs loaded from the data directory and POSTED, as by the webapp
+@pytest.fixture(scope='session')
+def inputs():
+    pytest.importorskip('posted')
+    from src.load import load_data, load_other, load_posted
+
+    ret = {}
+    load_data(ret)
+    load_posted(ret)
+    load_other(ret)
+    return ret
+
+
+@pytest.fixture(scope='session')
+def outputs(inputs):
+    from src.proc import process_inputs
+
+    ret = {}
+    process_inputs(inputs, ret)
+    return ret
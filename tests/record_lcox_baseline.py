@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+import argparse
+import copy
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+
+BASE_PATH = Path(__file__).parent.parent.resolve()
+FIXTURE_PATH = Path(__file__).parent / 'fixtures' / 'lcox_baseline.csv'
+
+# commit before the batch evaluation was added, whose update and processing code the fixture is recorded with
+BASELINE_COMMIT = '423a37b'
+
+KEYS = ['set', 'commodity', 'epdcase', 'impcase', 'impsubcase']
+
+
+# assumption sets of the regression test (in the format of src.lcox.evaluate), built from the default inputs
+def assumption_sets(inputs: dict) -> list:
+    return [
+        {},
+        {'wacc': {'RE-rich': 15.0, 'RE-scarce': 12.0}},
+        {'ocf': {'default': 0.6, 'ELH2': 0.3}},
+        {'transp_cost': inputs['transp_cost'].assign(assump=lambda df: df['assump'] * 2.0).to_dict('records')},
+        {'elec_prices': inputs['epdcases']
+            .pint.dequantify().droplevel('unit', axis=1)
+            .assign(**{'RE-rich': lambda df: df['RE-rich'] + 10.0})
+            .to_dict('records')},
+    ]
+
+
+# total cost per set, commodity, and case as computed by the code of the current directory (run in a checkout of the
+# baseline commit): every set is applied to freshly loaded inputs the way the webapp did before batch evaluation existed
+def evaluate_baseline():
+    import pandas as pd
+    from posted.calc_routines.LCOX import LCOX
+
+    from src.load import load_data, load_other, load_posted
+    from src.proc import process_inputs
+
+    defaults = {}
+    load_data(defaults)
+
+    results = []
+    for s, assumption_set in enumerate(assumption_sets(defaults)):
+        inputs = {}
+        load_data(inputs)
+        inputs['other_assump'] = copy.deepcopy(inputs['other_assump'])
+        inputs['other_assump']['irate'] |= assumption_set.get('wacc', {})
+        inputs['other_assump']['ocf'] |= assumption_set.get('ocf', {})
+        if 'elec_prices' in assumption_set:
+            inputs['epdcases'] = pd.DataFrame.from_records(assumption_set['elec_prices']) \
+                .astype({c: 'pint[EUR/MWh]' for c in ('RE-scarce', 'RE-rich')})
+        if 'transp_cost' in assumption_set:
+            inputs['transp_cost'] = pd.DataFrame.from_records(assumption_set['transp_cost']) \
+                .filter(['traded', 'impsubcase', 'assump', 'unit']) \
+                .astype({'assump': 'float'})
+        load_posted(inputs)
+        load_other(inputs)
+
+        outputs = {}
+        process_inputs(inputs, outputs)
+        for comm in inputs['value_chains']:
+            results.append(
+                outputs['tables'][comm]
+                    .assume(outputs['cases'][comm])
+                    .calc(LCOX)
+                    .data['LCOX']
+                    .pint.dequantify().droplevel('unit', axis=1)
+                    .sum(axis=1)
+                    .to_frame('value')
+                    .reset_index()
+                    .assign(set=s, commodity=comm)
+            )
+
+    return pd.concat(results).fillna({'impsubcase': ''})[KEYS + ['value']]
+
+
+# record the fixture of the LCOX regression test from a temporary checkout of the baseline commit
+def record():
+    parser = argparse.ArgumentParser(description='Record LCOX of the regression test from the baseline commit.')
+    parser.add_argument('--commit', default=BASELINE_COMMIT, help='commit to record the fixture with')
+    parser.add_argument('--evaluate', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # evaluation in a checkout of the baseline commit
+    if args.evaluate:
+        sys.path.insert(0, os.getcwd())
+        evaluate_baseline().to_csv(FIXTURE_PATH, index=False, float_format='%.10g')
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkout = Path(tmp) / 'baseline'
+        subprocess.run(['git', 'worktree', 'add', '--detach', str(checkout), args.commit], cwd=BASE_PATH, check=True)
+        try:
+            FIXTURE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            subprocess.run([sys.executable, str(Path(__file__).resolve()), '--evaluate'], cwd=checkout, check=True)
+        finally:
+            subprocess.run(['git', 'worktree', 'remove', '--force', str(checkout)], cwd=BASE_PATH, check=True)
+
+    print(f"Fixture written to {FIXTURE_PATH}.")
+
+
+# call record function when running as script
+if __name__ == '__main__':
+    record()
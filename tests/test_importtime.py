@@ -0,0 +1,23 @@
+import pytest
+import yaml
+
+from check_imports import BUDGET_PATH, check_entry_point
+
+CONFIG = yaml.safe_load(BUDGET_PATH.read_text())
+
+
+# import times of entry points must stay within the budgets recorded against the full dependency set, and entry points
+# must not import forbidden packages
+@pytest.mark.parametrize('entry_point', list(CONFIG['entry_points']))
+def test_import_budget(entry_point):
+    spec = CONFIG['entry_points'][entry_point]
+    try:
+        total, _, problems = check_entry_point(entry_point, spec, CONFIG['tolerance'], repeat=3)
+    except RuntimeError as ex:
+        if 'ModuleNotFoundError' in str(ex):
+            pytest.skip(f"dependencies of {entry_point} not installed")
+        raise
+
+    assert not problems, f"{entry_point} ({total:.0f} ms): {'; '.join(problems)}"
+    assert spec.get('budget') is not None, \
+        f"no import-time budget recorded for {entry_point}; record via `python check_imports.py --update`"
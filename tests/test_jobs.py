@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from src.jobs import JobQueue, JobStore
+from src.stages import stage
+
+
+# two queues sharing a job store stand in for two worker processes of a server
+@pytest.fixture
+def workers(tmp_path):
+    return JobQueue(max_workers=1, store=JobStore(tmp_path)), JobQueue(max_workers=1, store=JobStore(tmp_path))
+
+
+def test_job_visible_in_other_worker(workers):
+    pytest.importorskip('plotly')
+    a, b = workers
+    job = a.submit('session', lambda: {'fig1': {'data': [], 'layout': {}}})
+    assert job.wait(1, 10.0)
+
+    stored = b.get(job.id)
+    assert stored is not None
+    assert stored.status == 'done'
+    assert list(stored.figures) == ['fig1']
+    assert b.get('../' + job.id) is None
+
+
+def test_new_job_cancels_job_in_other_worker(workers):
+    a, b = workers
+    started, release = threading.Event(), threading.Event()
+
+    def run():
+        with stage('first'):
+            started.set()
+            release.wait(10.0)
+        with stage('second'):
+            pass
+
+    job = a.submit('session', run)
+    assert started.wait(10.0)
+    b.track('session')
+    release.set()
+
+    assert job.wait(0, 10.0)
+    assert job.status == 'cancelled'
+    assert b.get(job.id).status == 'cancelled'
+
+
+def test_cancelled_job_stays_cancelled():
+    queue = JobQueue(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def run():
+        started.set()
+        release.wait(10.0)
+
+    job = queue.submit('session', run)
+    assert started.wait(10.0)
+    job.cancel()
+    release.set()
+
+    assert job.wait(0, 10.0)
+    assert job.status == 'cancelled'
+
+
+def test_finished_sessions_are_pruned():
+    queue = JobQueue(max_workers=1, keep=0.0)
+    job = queue.submit('session', lambda: None)
+    assert job.wait(0, 10.0)
+    time.sleep(0.01)
+
+    queue.track('other')
+    assert 'session' not in queue._latest
+
+
+# jobs of requests without a session cookie must not cancel each other
+def test_jobs_without_session_are_not_cancelled(workers):
+    a, b = workers
+    first = a.track(None)
+    b.track(None)
+    a.track(None)
+    assert not first.cancelled
@@ -0,0 +1,83 @@
+import pytest
+
+pytest.importorskip('posted')
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from posted.calc_routines.LCOX import LCOX  # noqa: E402
+
+from record_lcox_baseline import FIXTURE_PATH, assumption_sets  # noqa: E402
+from src.lcox import evaluate  # noqa: E402
+
+
+KEYS = ['commodity', 'epdcase', 'impcase', 'impsubcase']
+
+
+def _by_set(result: pd.DataFrame) -> dict:
+    return {
+        s: df.set_index(KEYS)['value'].sort_index()
+        for s, df in result.fillna({'impsubcase': ''}).groupby('set')
+    }
+
+
+# the default assumption set reproduces the LCOX of the processed tables used by the figures
+def test_default_set_matches_processed_tables(inputs, outputs):
+    result = _by_set(evaluate(inputs, outputs, [{}]))[0]
+
+    expected = pd.concat([
+        outputs['tables'][comm]
+            .assume(outputs['cases'][comm])
+            .calc(LCOX)
+            .data['LCOX']
+            .pint.dequantify().droplevel('unit', axis=1)
+            .sum(axis=1)
+            .to_frame('value')
+            .reset_index()
+            .assign(commodity=comm)
+        for comm in inputs['value_chains']
+    ]).fillna({'impsubcase': ''}).set_index(KEYS)['value'].sort_index()
+
+    assert np.allclose(result.loc[expected.index].values, expected.values, rtol=1e-6)
+
+
+# changed assumptions must reach the evaluated tables rather than being shadowed by the defaults
+def test_changed_sets_differ_from_default(inputs, outputs):
+    transp_cost = inputs['transp_cost'] \
+        .assign(assump=lambda df: df['assump'] * 2.0) \
+        .to_dict('records')
+    sets = [
+        {},
+        {'wacc': {'RE-rich': 15.0, 'RE-scarce': 12.0}},
+        {'transp_cost': transp_cost},
+        {'ocf': {'default': 0.6, 'ELH2': 0.3}},
+    ]
+    results = _by_set(evaluate(inputs, outputs, sets))
+
+    for s in range(1, len(sets)):
+        assert not np.allclose(results[s].values, results[0].values), f"Set {sets[s]} gives the default LCOX."
+
+
+# sets without OCF in a batch with changed OCF keep the default OCF of the loaded data
+def test_default_ocf_in_mixed_batch(inputs, outputs):
+    alone = _by_set(evaluate(inputs, outputs, [{}]))[0]
+    mixed = _by_set(evaluate(inputs, outputs, [{'ocf': {'ELH2': 0.3}}, {}, {'wacc': {'RE-rich': 10.0}}]))
+
+    assert np.allclose(mixed[1].values, alone.values, rtol=1e-6)
+    assert not np.allclose(mixed[0].values, alone.values)
+
+
+# evaluation in a single pass reproduces the LCOX computed by the update and processing code of the baseline commit for
+# each set separately (fixture recorded via `python tests/record_lcox_baseline.py`)
+def test_sets_match_baseline(inputs, outputs):
+    if not FIXTURE_PATH.exists():
+        pytest.skip(f"No baseline fixture in {FIXTURE_PATH}; record via `python tests/record_lcox_baseline.py`.")
+    keys = ['set'] + KEYS
+    expected = pd.read_csv(FIXTURE_PATH, keep_default_na=False).set_index(keys)['value'].sort_index()
+
+    result = evaluate(inputs, outputs, assumption_sets(inputs)) \
+        .fillna({'impsubcase': ''}) \
+        .set_index(keys)['value'] \
+        .sort_index()
+
+    assert result.index.equals(expected.index)
+    assert np.allclose(result.values, expected.values, rtol=1e-6)
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip('posted')
+
+import pandas as pd  # noqa: E402
+
+from src.lcox import evaluate  # noqa: E402
+from src.load import load_data, load_other, load_posted  # noqa: E402
+from src.manifest import inputs_hash  # noqa: E402
+from src.proc import process_inputs  # noqa: E402
+
+
+def _load(prune: bool) -> tuple:
+    inputs, outputs = {}, {}
+    load_data(inputs)
+    load_posted(inputs, prune=prune)
+    load_other(inputs)
+    process_inputs(inputs, outputs)
+    return inputs, outputs
+
+
+# dropping parameter columns not required by the calc routines must not change any result on the shipped data
+def test_pruning_keeps_results():
+    sets = [
+        {},
+        {'wacc': {'RE-rich': 15.0, 'RE-scarce': 12.0}},
+        {'ocf': {'default': 0.6, 'ELH2': 0.3}},
+    ]
+    results = {}
+    for prune in (True, False):
+        inputs, outputs = _load(prune)
+        if prune:
+            assert sum(inputs['pruned_bytes'].values()) > 0
+        for detailed in (False, True):
+            results[prune, detailed] = evaluate(inputs, outputs, sets, detailed=detailed) \
+                .pipe(lambda df: df.sort_values(by=[c for c in df.columns if c != 'value'])) \
+                .reset_index(drop=True)
+
+    for detailed in (False, True):
+        pd.testing.assert_frame_equal(results[True, detailed], results[False, detailed], rtol=1e-9)
+
+
+def test_inputs_hash_covers_pruning(monkeypatch):
+    monkeypatch.delenv('GVC_PRUNE_COLUMNS', raising=False)
+    default = inputs_hash()
+    monkeypatch.setenv('GVC_PRUNE_COLUMNS', '0')
+    assert inputs_hash() != default
@@ -0,0 +1,60 @@
+import contextvars
+import threading
+import tracemalloc
+
+import pytest
+
+pytest.importorskip('pandas')
+
+from src import metrics  # noqa: E402
+
+
+# Dash runs callbacks in a copy of the context of the request, so the report must reach the teardown handler of the
+# request in another way
+def test_generate_request_writes_report(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'REPORT_ALLOC', True)
+    monkeypatch.setattr(metrics, 'REPORT_DIR', tmp_path)
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        def callback():
+            metrics.report_generate({}, 'simple-update', [1])
+            with metrics.measure('test'):
+                bytearray(1024)
+
+        contextvars.copy_context().run(callback)
+        metrics.end_report()
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    reports = list(tmp_path.glob('*-callback-alloc.json'))
+    assert len(reports) == 1
+
+
+# a stage starting on another thread while a traced stage is open must not reset the tracemalloc peak of that stage
+def test_concurrent_requests_do_not_record_peaks():
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    hists = metrics._metrics['peak_alloc_bytes'][2]
+    try:
+        with metrics.measure('test.outer'):
+            done = []
+
+            def other():
+                with metrics.measure('test.other'):
+                    done.append(True)
+
+            thread = threading.Thread(target=other)
+            thread.start()
+            thread.join()
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    assert done
+    assert 'test.other' not in hists
+    assert 'test.outer' in hists
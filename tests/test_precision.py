@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip('pint_pandas')
+
+import pandas as pd  # noqa: E402
+from pint_pandas import PintArray  # noqa: E402
+
+from src.manifest import inputs_hash  # noqa: E402
+from src.precision import compact_frame  # noqa: E402
+
+
+def test_compact_frame_keeps_units():
+    df = pd.DataFrame({
+        'value': PintArray([1.0, 2.5], dtype='kWh'),
+        'share': [0.1, 0.2],
+        'name': ['a', 'b'],
+    })
+    compact = compact_frame(df, 'float32')
+
+    assert compact['value'].pint.units == df['value'].pint.units
+    assert compact['value'].pint.magnitude.dtype == 'float32'
+    assert compact['share'].dtype == 'float32'
+    assert compact['name'].dtype == df['name'].dtype
+    assert (compact['value'].pint.magnitude == df['value'].pint.magnitude).all()
+
+
+def test_inputs_hash_covers_precision(monkeypatch):
+    monkeypatch.delenv('GVC_PRECISION', raising=False)
+    default = inputs_hash()
+    monkeypatch.setenv('GVC_PRECISION', 'float64')
+    assert inputs_hash() == default
+    monkeypatch.setenv('GVC_PRECISION', 'float32')
+    assert inputs_hash() != default
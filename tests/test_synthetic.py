@@ -0,0 +1,19 @@
+import pytest
+
+pytest.importorskip('posted')
+
+import numpy as np  # noqa: E402
+
+from src.synthetic import _chain  # noqa: E402
+
+
+@pytest.mark.parametrize('n_processes', [2, 3, 5])
+def test_chain_of_depth_one(n_processes):
+    chain = _chain('C00', np.random.default_rng(0), n_processes, 1, 3)
+    assert chain['graph'] == {'C00-P000': {'h2': 'ELH2'}, 'ELH2': {}}
+
+
+def test_chain_contains_all_processes():
+    chain = _chain('C00', np.random.default_rng(0), 8, 3, 3)
+    assert len(chain['graph']) == 8
+    assert sum(len(group) for group in chain['locations']) == 8
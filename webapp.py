@@ -1,13 +1,18 @@
 #!/usr/bin/env python
+import os
+import threading
 from pathlib import Path
 
 import pint
 from posted.units.units import ureg
-from piw import Webapp
-from dash.dependencies import Input, State
-from dash import html
 
-from src.ctrls import main_ctrl
+from src.ctrls import main_ctrl, explore_ctrl, register_ctrl_callbacks
+from src.jobs import track_generate
+from src.metrics import report_generate
+from src.patch import PATCH_UPDATES, defer_generate, register_patch_callbacks
+from src.pipeline import keep_defaults
+from src.profiling import profile_generate
+from src.shared import freeze_inputs, thaw
 from src.plots.LevelisedPlot import LevelisedPlot
 from src.plots.ScenarioPlot import ScenarioPlot
 from src.plots.SensitivityPlot import SensitivityPlot
@@ -30,22 +35,6 @@ metadata = {
                 'green value chains of energy-intensive basic materials. The presented figures compare levelised '
                 'production cost from techno-economic assessment for different depth of relocation for the green '
                 'value chains of steel, urea, and ethylene.',
-    'about': html.Div([
-        html.P('This interactive webapp can be used to reproduce figures from an accompanying article by the same '
-               'authors that studies the renewables pull and its impact on industrial relocation for future global '
-               'green value chains of energy-intensive basic materials. Some of the main assumptions, i.e. the '
-               'electricity prices and the transport cost can be changed here when generating the figures.'),
-        html.P('We employ techno-economic assessments to compute the levelised cost of production for the studied '
-               'green (i.e. low-carbon) value chains of steel, urea, and ethylene for cases of varying depth of '
-               'relocation.'),
-        html.P('The results show that substantial relocation savings for the levelised cost of production can be '
-               'anticipated for full relocation of the studied value chains. Moreover, by studying cases of varying '
-               'depth of relocation, we can demonstrate that a large share of the energy-cost savings is associated '
-               'with relocating electrolysis to more renewable-favourable locations, yet the high transportation '
-               'cost of shipping-based hydrogen imports result in only minor overall relocation savings.'),
-        html.P('For more advanced changes and detailed information on the input data and methodology, we encourage '
-               'users to inspect the article, its supplement, and the source code written in Python.'),
-    ]),
     'authors': [
         {
             'first': 'Philipp C.',
@@ -85,34 +74,105 @@ metadata = {
 }
 
 
-# define webapp
-webapp = Webapp(
-    piw_id='green-value-chains',
-    metadata=metadata,
-    pages={
-        '': 'Main',
-        'ext-data': 'Ext. Data Figs.',
-    },
-    load=[load_data, load_posted, load_other],
-    ctrls=[main_ctrl],
-    generate_args=[
+# paragraphs of the about section of the metadata
+about = [
+    'This interactive webapp can be used to reproduce figures from an accompanying article by the same '
+    'authors that studies the renewables pull and its impact on industrial relocation for future global '
+    'green value chains of energy-intensive basic materials. Some of the main assumptions, i.e. the '
+    'electricity prices and the transport cost can be changed here when generating the figures.',
+    'We employ techno-economic assessments to compute the levelised cost of production for the studied '
+    'green (i.e. low-carbon) value chains of steel, urea, and ethylene for cases of varying depth of '
+    'relocation.',
+    'The results show that substantial relocation savings for the levelised cost of production can be '
+    'anticipated for full relocation of the studied value chains. Moreover, by studying cases of varying '
+    'depth of relocation, we can demonstrate that a large share of the energy-cost savings is associated '
+    'with relocating electrolysis to more renewable-favourable locations, yet the high transportation '
+    'cost of shipping-based hydrogen imports result in only minor overall relocation savings.',
+    'For more advanced changes and detailed information on the input data and methodology, we encourage '
+    'users to inspect the article, its supplement, and the source code written in Python.',
+]
+
+
+# plots produced by the webapp and directory for exporting them
+plots = [TotalCostPlot, LevelisedPlot, SensitivityPlot, ScenarioPlot]
+output_dir = Path(os.environ.get('GVC_OUTPUT_DIR', Path(__file__).parent / 'print'))
+
+
+# arguments of GENERATE callbacks
+def generate_args() -> list:
+    from dash.dependencies import Input, State
+
+    return [
         Input('simple-update', 'n_clicks'),
         State('simple-elec-prices', 'data'),
         State('simple-transp-cost', 'data'),
         State('simple-scenarios', 'data'),
         State('simple-volumes', 'data'),
-    ],
-    update=[update_inputs],
-    proc=[process_inputs],
-    plots=[TotalCostPlot, LevelisedPlot, SensitivityPlot, ScenarioPlot],
-    glob_cfg=load_yaml_config_file('global'),
-    output=Path(__file__).parent / 'print',
-    debug=False,
-    input_caching=True,
-)
+    ]
+
+
+# define webapp and register its callbacks; the Dash app and its layout components are only created on first use, so
+# that entry points importing this module for its plots (e.g. export.py with all figures up to date) skip them
+def create_webapp():
+    from dash import html
+    from piw import Webapp
+
+    ret = Webapp(
+        piw_id='green-value-chains',
+        metadata=metadata | {'about': html.Div([html.P(p) for p in about])},
+        pages={
+            '': 'Main',
+            'ext-data': 'Ext. Data Figs.',
+        },
+        load=[load_data, load_posted, load_other, freeze_inputs, keep_defaults],
+        ctrls=[main_ctrl, explore_ctrl],
+        generate_args=generate_args(),
+        update=[defer_generate, profile_generate, report_generate, track_generate, update_inputs],
+        proc=[process_inputs],
+        plots=plots,
+        glob_cfg=thaw(load_yaml_config_file('global')),
+        output=output_dir,
+        debug=False,
+        input_caching=True,
+    )
+    register_ctrl_callbacks()
+
+    # deliver figures of GENERATE clicks progressively and as partial updates if enabled
+    if PATCH_UPDATES:
+        register_patch_callbacks(plots, generate_args())
+
+    return ret
+
+
+_webapp = None
+_webapp_lock = threading.Lock()
+
+
+# the webapp, created on first use; also available as attribute `webapp` of this module
+def get_webapp():
+    global _webapp
+    with _webapp_lock:
+        if _webapp is None:
+            _webapp = create_webapp()
+    return _webapp
+
+
+def __getattr__(name: str):
+    if name == 'webapp':
+        return get_webapp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# start webapp and register additional HTTP endpoints
+def start():
+    from src.api import register_api
+
+    webapp = get_webapp()
+    webapp.start()
+    register_api(webapp.flask_app, plots)
 
 
 # this will allow running the webapp locally
 if __name__ == '__main__':
-    webapp.start()
-    webapp.run()
+    start()
+    get_webapp().run()
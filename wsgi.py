@@ -1,7 +1,7 @@
 import sys, os
 sys.path.insert(0,os.path.dirname(__file__))
 
-from webapp import webapp
+from webapp import webapp, start
 
-webapp.start()
+start()
 application = webapp.flask_app